@@ -1,22 +1,41 @@
 # Copyright (c) 2015 Ultimaker B.V.
 # Uranium is released under the terms of the LGPLv3 or higher.
 
+import os.path
+
+from bisect import bisect_left, bisect_right
+
+from UM.Application import Application
+from UM.Logger import Logger
 from UM.Resources import Resources
 
 from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
 
 from UM.View.GL.OpenGL import OpenGL
+from UM.View.RenderBatch import RenderBatch
 
 from cura.CuraView import CuraView
 from cura.Scene.ConvexHullNode import ConvexHullNode
 
 ## Standard view for mesh models.
+#
+#  When the layer preview is enabled, the sliced layer data is also drawn as plain coloured lines without the travel moves.
+#  The range of elements for the min/max layers selected in the simulation view is found with a bisect of the per layer
+#  prefix sums of the element counts which are computed when the layer data is added to the scene.
 
 class FastView(CuraView):
     def __init__(self):
         super().__init__(parent = None, use_empty_menu_placeholder = True)
 
         self._shader = None
+        self._layer_shader = None
+        self._layer_ranges = {}
+
+        preferences = Application.getInstance().getPreferences()
+        preferences.addPreference("fastview/layer_preview", True)
+        preferences.preferenceChanged.connect(self._onPreferenceChanged)
+        self._scene_connected = False
+        self._onPreferenceChanged("fastview/layer_preview")
 
     def beginRendering(self):
         scene = self.getController().getScene()
@@ -25,12 +44,89 @@ class FastView(CuraView):
         if not self._shader:
             self._shader = OpenGL.getInstance().createShaderProgram(Resources.getPath(Resources.Shaders, "transparent_object.shader"))
 
+        layer_preview = Application.getInstance().getPreferences().getValue("fastview/layer_preview")
+        if layer_preview and not self._layer_shader:
+            self._layer_shader = OpenGL.getInstance().createShaderProgram(os.path.join(os.path.dirname(os.path.realpath(__file__)), "layers.shader"))
+
+        layer_data_seen = set()
         for node in DepthFirstIterator(scene.getRoot()):
             if type(node) is ConvexHullNode:
                 continue
+            if layer_preview and node.isVisible():
+                layer_data = node.callDecoration("getLayerData")
+                if layer_data:
+                    layer_data_seen.add(id(layer_data))
+                    self._queueLayers(renderer, node, layer_data)
+                    continue
             if not node.render(renderer):
                 if node.getMeshData() and node.isVisible() and not node.callDecoration("isNonPrintingMesh"):
                     renderer.queueNode(node, shader = self._shader)
 
+        # forget the layer data from previous slices
+        for key in list(self._layer_ranges.keys()):
+            if key not in layer_data_seen:
+                del self._layer_ranges[key]
+
     def endRendering(self):
         pass
+
+    def _onPreferenceChanged(self, preference):
+        # the scene is only watched for new layer data while the layer preview is enabled
+        if preference != "fastview/layer_preview":
+            return
+        layer_preview = Application.getInstance().getPreferences().getValue("fastview/layer_preview")
+        scene = Application.getInstance().getController().getScene()
+        if layer_preview and not self._scene_connected:
+            scene.sceneChanged.connect(self._onSceneChanged)
+            self._scene_connected = True
+        elif not layer_preview and self._scene_connected:
+            scene.sceneChanged.disconnect(self._onSceneChanged)
+            self._scene_connected = False
+            self._layer_ranges = {}
+
+    def _onSceneChanged(self, source):
+        # the layer data from a slice is added to the scene root as a child node, only the ranges of the layer data
+        # that is currently in the scene are kept so the previous slices' layer data can be freed
+        if source.getParent() is not None:
+            if not source.callDecoration("getLayerData"):
+                return
+            source = source.getParent()
+        layer_ranges = {}
+        for node in source.getChildren():
+            layer_data = node.callDecoration("getLayerData")
+            if layer_data:
+                layer_ranges[id(layer_data)] = self._getLayerRanges(layer_data)
+        self._layer_ranges = layer_ranges
+
+    def _queueLayers(self, renderer, node, layer_data):
+        layer_data, layer_numbers, offsets = self._getLayerRanges(layer_data)
+        if not layer_numbers:
+            return
+        simulation_view = self.getController().getView("SimulationView")
+        if simulation_view:
+            start = offsets[bisect_left(layer_numbers, simulation_view.getMinimumLayer())]
+            end = offsets[bisect_right(layer_numbers, simulation_view.getCurrentLayer())]
+        else:
+            start = 0
+            end = offsets[-1]
+        if end > start:
+            renderer.queueNode(node, mesh = layer_data, shader = self._layer_shader, mode = RenderBatch.RenderMode.Lines, range = (start, end))
+
+    def _getLayerRanges(self, layer_data):
+        # offsets[i] is the index of the first element of layer_numbers[i] and offsets[-1] is the total element count
+        layer_ranges = self._layer_ranges.get(id(layer_data))
+        if layer_ranges is not None and layer_ranges[0] is layer_data:
+            return layer_ranges
+        try:
+            element_counts = layer_data.getElementCounts()
+            layer_numbers = sorted(element_counts.keys())
+            offsets = [ 0 ]
+            for layer_number in layer_numbers:
+                offsets.append(offsets[-1] + element_counts[layer_number])
+            layer_ranges = (layer_data, layer_numbers, offsets)
+        except Exception as e:
+            Logger.log("e", "Exception building layer ranges: %s", e)
+            # don't keep trying, the layers just aren't drawn
+            layer_ranges = (layer_data, [], [ 0 ])
+        self._layer_ranges[id(layer_data)] = layer_ranges
+        return layer_ranges
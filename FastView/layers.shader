@@ -0,0 +1,81 @@
+[shaders]
+vertex =
+    uniform highp mat4 u_modelMatrix;
+    uniform highp mat4 u_viewMatrix;
+    uniform highp mat4 u_projectionMatrix;
+
+    attribute highp vec4 a_vertex;
+    attribute lowp vec4 a_color;
+    attribute lowp float a_line_type;
+
+    varying lowp vec4 v_color;
+    varying lowp float v_line_type;
+
+    void main()
+    {
+        gl_Position = u_projectionMatrix * u_viewMatrix * u_modelMatrix * a_vertex;
+        v_color = a_color;
+        v_line_type = a_line_type;
+    }
+
+fragment =
+    varying lowp vec4 v_color;
+    varying lowp float v_line_type;
+
+    void main()
+    {
+        // travel moves (8 = combing, 9 = retraction) are not drawn
+        if ((v_line_type >= 7.5) && (v_line_type <= 9.5))
+        {
+            discard;
+        }
+        gl_FragColor = vec4(v_color.rgb, 1.0);
+    }
+
+vertex41core =
+    #version 410
+    uniform highp mat4 u_modelMatrix;
+    uniform highp mat4 u_viewMatrix;
+    uniform highp mat4 u_projectionMatrix;
+
+    in highp vec4 a_vertex;
+    in lowp vec4 a_color;
+    in lowp float a_line_type;
+
+    out lowp vec4 v_color;
+    out lowp float v_line_type;
+
+    void main()
+    {
+        gl_Position = u_projectionMatrix * u_viewMatrix * u_modelMatrix * a_vertex;
+        v_color = a_color;
+        v_line_type = a_line_type;
+    }
+
+fragment41core =
+    #version 410
+    in lowp vec4 v_color;
+    in lowp float v_line_type;
+
+    out vec4 frag_color;
+
+    void main()
+    {
+        // travel moves (8 = combing, 9 = retraction) are not drawn
+        if ((v_line_type >= 7.5) && (v_line_type <= 9.5))
+        {
+            discard;
+        }
+        frag_color = vec4(v_color.rgb, 1.0);
+    }
+
+[defaults]
+
+[bindings]
+u_modelMatrix = model_matrix
+u_viewMatrix = view_matrix
+u_projectionMatrix = projection_matrix
+
+[attributes]
+a_vertex = vertex
+a_color = color
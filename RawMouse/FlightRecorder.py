@@ -0,0 +1,59 @@
+# Copyright (c) 2020-2024 burtoogle.
+# RawMouse is released under the terms of the AGPLv3 or higher.
+
+import itertools
+import struct
+import time
+
+## Fixed size ring buffer of compact binary records describing the decoded axis events and the
+#  resulting camera updates.
+#
+#  Recording is cheap enough to be always on: a slot is claimed with next() on an itertools.count
+#  (atomic under the GIL so the reader and GUI threads can both record without a lock) and the
+#  record is packed straight into a preallocated bytearray. The buffer is only decoded when it is
+#  dumped.
+
+class FlightRecorder:
+    # record kinds
+    AXES = 1
+    CAMERA = 2
+
+    # view state, the active view index is or'ed with FAST_VIEW when RawMouse has switched to the fast view
+    VIEWS = ("", "SolidView", "SimulationView", "FastView", "XRayView")
+    FAST_VIEW = 0x80
+
+    # timestamp, kind, view state, 6 raw axes, 6 thresholded work values, camera update duration (ms)
+    _RECORD = struct.Struct("<dBB6f6ff")
+
+    def __init__(self, capacity = 4096):
+        self._capacity = capacity
+        self._buf = bytearray(capacity * self._RECORD.size)
+        self._slots = itertools.count()
+
+    def record(self, kind, view_state, axes, work, duration = 0.0):
+        offset = (next(self._slots) % self._capacity) * self._RECORD.size
+        self._RECORD.pack_into(self._buf, offset, time.monotonic(), kind, view_state,
+            axes[0], axes[1], axes[2], axes[3], axes[4], axes[5],
+            work[0], work[1], work[2], work[3], work[4], work[5], duration)
+
+    @classmethod
+    def getViewState(cls, view_id, fast_view):
+        view_state = cls.VIEWS.index(view_id) if view_id in cls.VIEWS else 0
+        return view_state | cls.FAST_VIEW if fast_view else view_state
+
+    def getRecords(self):
+        # unused slots have a zero timestamp, the slots are in time order once sorted by timestamp
+        records = [ r for r in self._RECORD.iter_unpack(bytes(self._buf)) if r[0] != 0.0 ]
+        records.sort(key = lambda r: r[0])
+        return records
+
+    def dump(self, path, work_names):
+        records = self.getRecords()
+        end = records[-1][0] if records else 0.0
+        with open(path, "w", encoding = "utf-8") as f:
+            f.write(",".join([ "time_ms", "kind", "view", "fast_view" ] + [ "axis%d" % i for i in range(0, 6) ] + list(work_names) + [ "duration_ms" ]) + "\n")
+            for r in records:
+                view_state = r[2]
+                f.write("%.3f,%s,%s,%d," % ((r[0] - end) * 1000, "axes" if r[1] == self.AXES else "camera", self.VIEWS[view_state & 0x7f] if (view_state & 0x7f) < len(self.VIEWS) else "", (view_state & self.FAST_VIEW) != 0))
+                f.write(",".join([ "%g" % v for v in r[3:15] ]) + ",%.3f\n" % r[15])
+        return len(records)
@@ -0,0 +1,175 @@
+# Copyright (c) 2020-2024 burtoogle.
+# RawMouse is released under the terms of the AGPLv3 or higher.
+
+import json
+import os
+import socketserver
+import stat
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+from UM.Logger import Logger
+
+## Counters for the RawMouse input pipeline.
+#
+#  The counters are plain attributes that are bumped from the reader and GUI threads without
+#  any locking, they are always maintained because an integer increment is much cheaper than
+#  verbose logging. The optional exporter serves them on a localhost TCP port or a Unix socket
+#  either in the Prometheus text format (/metrics) or as JSON (/metrics.json).
+
+class Metrics:
+    def __init__(self):
+        self.reports_read = {}
+        self.decode_errors = 0
+        self.coalesced_samples = 0
+        self.dropped_samples = 0
+        self.process_axes_dispatches = 0
+        self.process_buttons_dispatches = 0
+        self.view_switches = 0
+        self.reader_restarts = 0
+        self.battery_level = None
+        self.init_time_ms = None
+        self.discovery_time_ms = None
+        self.first_report_ms = None
+        self.prediction_error = None
+        self.prediction_latency_ms = None
+
+        self._server = None
+        self._server_thread = None
+        self._socket_path = None
+
+    def addDevice(self, device):
+        if device not in self.reports_read:
+            self.reports_read[device] = 0
+
+    def getValues(self):
+        return {
+            "reports_read": dict(self.reports_read),
+            "decode_errors": self.decode_errors,
+            "coalesced_samples": self.coalesced_samples,
+            "dropped_samples": self.dropped_samples,
+            "process_axes_dispatches": self.process_axes_dispatches,
+            "process_buttons_dispatches": self.process_buttons_dispatches,
+            "view_switches": self.view_switches,
+            "reader_restarts": self.reader_restarts,
+            "battery_level": self.battery_level,
+            "init_time_ms": self.init_time_ms,
+            "discovery_time_ms": self.discovery_time_ms,
+            "first_report_ms": self.first_report_ms,
+            "prediction_error": self.prediction_error,
+            "prediction_latency_ms": self.prediction_latency_ms
+        }
+
+    def toJson(self):
+        return json.dumps(self.getValues())
+
+    def toPrometheus(self):
+        values = self.getValues()
+        lines = []
+        def add(name, type, help, samples):
+            lines.append("# HELP rawmouse_%s %s" % (name, help))
+            lines.append("# TYPE rawmouse_%s %s" % (name, type))
+            for labels, value in samples:
+                lines.append("rawmouse_%s%s %s" % (name, labels, value))
+        add("reports_read_total", "counter", "HID reports read from the device.",
+            [ ("{device=\"%s\"}" % device.replace("\\", "\\\\").replace("\"", "\\\""), count) for device, count in sorted(values["reports_read"].items()) ])
+        add("decode_errors_total", "counter", "Reports that could not be decoded.", [ ("", values["decode_errors"]) ])
+        add("coalesced_samples_total", "counter", "Axis samples merged into an already pending camera update.", [ ("", values["coalesced_samples"]) ])
+        add("dropped_samples_total", "counter", "Samples discarded because Cura was inactive or the maxhz limit was reached.", [ ("", values["dropped_samples"]) ])
+        add("process_axes_dispatches_total", "counter", "Axis updates dispatched to the GUI thread.", [ ("", values["process_axes_dispatches"]) ])
+        add("process_buttons_dispatches_total", "counter", "Button actions dispatched to the GUI thread.", [ ("", values["process_buttons_dispatches"]) ])
+        add("view_switches_total", "counter", "Active view changes made by RawMouse.", [ ("", values["view_switches"]) ])
+        add("reader_restarts_total", "counter", "Event reader restarts.", [ ("", values["reader_restarts"]) ])
+        if values["battery_level"] is not None:
+            add("battery_level_percent", "gauge", "Battery level reported by the device.", [ ("", values["battery_level"]) ])
+        if values["init_time_ms"] is not None:
+            add("init_time_milliseconds", "gauge", "Time spent by the plugin on Cura's startup path.", [ ("", values["init_time_ms"]) ])
+        if values["discovery_time_ms"] is not None:
+            add("discovery_time_milliseconds", "gauge", "Time taken by the last background device discovery.", [ ("", values["discovery_time_ms"]) ])
+        if values["first_report_ms"] is not None:
+            add("first_report_milliseconds", "gauge", "Time from the last start or restart to the first report read.", [ ("", values["first_report_ms"]) ])
+        if values["prediction_error"] is not None:
+            add("prediction_error_ratio", "gauge", "Mean relative error of the predicted axis work values.", [ ("", values["prediction_error"]) ])
+        if values["prediction_latency_ms"] is not None:
+            add("prediction_hidden_latency_milliseconds", "gauge", "Mean age of the report that each predicted camera update was based on.", [ ("", values["prediction_latency_ms"]) ])
+        return "\n".join(lines) + "\n"
+
+    def startServer(self, options):
+        if self._server is not None or not options or not options.get("enabled", 0):
+            return
+        metrics = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/metrics":
+                    body = metrics.toPrometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path == "/metrics.json":
+                    body = metrics.toJson().encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def address_string(self):
+                return "local"
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            if "socket" in options:
+                if _UnixMetricsServer is None:
+                    raise Exception("Unix sockets are not supported on this platform")
+                socket_path = options["socket"]
+                if os.path.exists(socket_path):
+                    # only replace a stale socket, never some other file at a mistyped path
+                    if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                        raise Exception("%s exists and is not a socket" % socket_path)
+                    os.remove(socket_path)
+                self._socket_path = socket_path
+                self._server = _UnixMetricsServer(self._socket_path, Handler)
+                Logger.log("d", "Serving metrics on %s", self._socket_path)
+            else:
+                host = options.get("host", "127.0.0.1")
+                if host not in ("127.0.0.1", "::1", "localhost"):
+                    Logger.log("w", "Metrics can only be served on localhost, ignoring host %s", host)
+                    host = "127.0.0.1"
+                self._server = _TCPMetricsServer((host, int(options.get("port", 9631))), Handler)
+                Logger.log("d", "Serving metrics on %s:%d", *self._server.server_address[0:2])
+        except Exception as e:
+            Logger.log("e", "Exception starting metrics server: %s", e)
+            self._server = None
+            return
+        self._server_thread = Thread(target = self._server.serve_forever, daemon = True, name = "RawMouseMetrics")
+        self._server_thread.start()
+
+    def stopServer(self):
+        if self._server is None:
+            return
+        try:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server_thread.join(timeout = 2.0)
+            if self._socket_path and os.path.exists(self._socket_path):
+                os.remove(self._socket_path)
+        except Exception as e:
+            Logger.log("e", "Exception stopping metrics server: %s", e)
+        self._server = None
+        self._server_thread = None
+        self._socket_path = None
+
+class _TCPMetricsServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixMetricsServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixMetricsServer = None
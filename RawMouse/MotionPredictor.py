@@ -0,0 +1,92 @@
+# Copyright (c) 2020-2024 burtoogle.
+# RawMouse is released under the terms of the AGPLv3 or higher.
+
+## Predicts the axis work values between device reports so that the camera can be updated at the display rate.
+#
+#  update() is called by the reader for every report with the thresholded work values (in the order movx, movy,
+#  rotyaw, rotpitch, rotroll, zoom) and keeps a smoothed per axis velocity estimate. predict() is called by the
+#  GUI thread's timer and extrapolates the last report using that velocity, easing the output towards each new
+#  report rather than jumping. The reader's state is a tuple that is replaced as a whole so the two threads
+#  don't need a lock.
+
+class MotionPredictor:
+    def __init__(self, horizon = 0.05, hold = 0.25, smoothing = 0.03):
+        self._horizon = horizon        # the longest time (s) a report's velocity is extrapolated for
+        self._hold = hold              # motion stops if there hasn't been a report for this long (s)
+        self._smoothing = smoothing    # time constant (s) for easing the output towards a new report
+        self._state = None             # (time, work, velocity) of the last report, None when not moving
+        self._output = None
+        self._output_at = None
+        self.resetStats()
+
+    def resetStats(self):
+        self._error_sum = 0.0
+        self._error_count = 0
+        self._latency_sum = 0.0
+        self._latency_count = 0
+
+    def update(self, t, work):
+        # returns True when the motion starts
+        state = self._state
+        if not any(work):
+            # the device is back at rest, stop immediately rather than extrapolating
+            self._state = None
+            return False
+        if state is None or t - state[0] > self._hold:
+            # starting, or restarting after a gap in the reports that stopped the motion
+            self._state = (t, work, (0.0,) * len(work))
+            return True
+        last_t, last_work, last_velocity = state
+        # measure how far off the prediction for this instant was
+        predicted = self._extrapolate(state, t)
+        if predicted is not None:
+            magnitude = sum([ abs(w) for w in work ])
+            self._error_sum += sum([ abs(p - w) for p, w in zip(predicted, work) ]) / magnitude
+            self._error_count += 1
+        dt = t - last_t
+        if dt > 0.0:
+            velocity = tuple([ v + ((w - lw) / dt - v) * 0.5 for w, lw, v in zip(work, last_work, last_velocity) ])
+        else:
+            velocity = last_velocity
+        self._state = (t, work, velocity)
+        return False
+
+    def predict(self, t):
+        # returns the work values for time t or None when there is no motion
+        state = self._state
+        target = self._extrapolate(state, t) if state is not None else None
+        if target is None:
+            # stopped, the state is left to update() which treats the next report after a gap as a new start, clearing
+            # it here could throw away a report that update() has just stored
+            self._output = None
+            return None
+        if self._output is None:
+            output = target
+        else:
+            k = min(1.0, (t - self._output_at) / self._smoothing)
+            output = tuple([ o + (g - o) * k for o, g in zip(self._output, target) ])
+        self._output = output
+        self._output_at = t
+        # without prediction, this update would have had to wait for the next report
+        self._latency_sum += t - state[0]
+        self._latency_count += 1
+        return output
+
+    def getStats(self):
+        # returns the mean relative prediction error and the mean age (ms) of the reports the predicted updates were based on
+        error = self._error_sum / self._error_count if self._error_count else 0.0
+        latency = 1000 * self._latency_sum / self._latency_count if self._latency_count else 0.0
+        return error, latency
+
+    def _extrapolate(self, state, t):
+        last_t, work, velocity = state
+        dt = t - last_t
+        if dt > self._hold:
+            return None
+        dt = min(dt, self._horizon)
+        predicted = []
+        for w, v in zip(work, velocity):
+            p = w + v * dt
+            # never extrapolate through zero into the opposite direction
+            predicted.append(p if p * w > 0.0 else 0.0)
+        return tuple(predicted)
@@ -8,10 +8,10 @@ import time
 import os
 import os.path
 import platform
+import subprocess
 
-from ctypes import *
-
-from threading import Thread
+from collections import deque, namedtuple
+from threading import Thread, current_thread
 
 from UM.Event import MouseEvent, WheelEvent
 from UM.Extension import Extension
@@ -19,6 +19,7 @@ from UM.Logger import Logger
 from UM.Math.Vector import Vector
 from UM.Math.Matrix import Matrix
 from UM.Message import Message
+from UM.Resources import Resources
 from UM.Signal import Signal, signalemitter
 from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
 from UM.Scene.SceneNode import SceneNode
@@ -39,11 +40,39 @@ except ImportError:
 from UM.i18n import i18nCatalog
 catalog = i18nCatalog("cura")
 
-libspnav = None
+from .FlightRecorder import FlightRecorder
+from .Metrics import Metrics
+from .MotionPredictor import MotionPredictor
+from . import ReaderProcess
+from .ReportDecoder import ReportDecoder
+from . import Spnav
+
+# the axis targets in the order of the work vector
+AXIS_TARGETS = ("movx", "movy", "rotyaw", "rotpitch", "rotroll", "zoom")
+MOVX, MOVY, ROTYAW, ROTPITCH, ROTROLL, ZOOM = range(0, 6)
+
+# alternative names for axis targets
+AXIS_ALIASES = {
+    "rotx": "rotyaw",
+    "roty": "rotpitch"
+}
+
+# Snapshot of the GUI state needed by the reader thread. It is immutable and only ever replaced by the
+# GUI thread so the reader can use it without reaching into Qt or the scene from the wrong thread.
+# The keyboard modifiers are not part of it, they are only used by the GUI thread which queries them when needed.
+GuiState = namedtuple("GuiState", [ "window_active", "zoom_scale", "stage_id", "view_id" ])
+
+# A button definition from the profile, repeat and repeat_delay are in ms
+ButtonDef = namedtuple("ButtonDef", [ "target", "value", "repeat", "repeat_delay" ])
+
+# A button press queued by the reader for the GUI thread, a target of None releases the button
+ButtonAction = namedtuple("ButtonAction", [ "button", "target", "value" ])
 
 @signalemitter
 class RawMouse(Extension, QObject,):
     def __init__(self, parent = None):
+        init_started_at = QElapsedTimer()
+        init_started_at.start()
         QObject.__init__(self, parent)
         Extension.__init__(self)
 
@@ -61,6 +90,7 @@ class RawMouse(Extension, QObject,):
         self._main_window = None
         self._scene = None
         self._camera_tool = None
+        self._gui_state = GuiState(False, 1.0, "", "")
         self._lastPreviewStageView = "SimulationView"
 
         self.setMenuName(catalog.i18nc("@item:inmenu", "RawMouse"))
@@ -68,33 +98,132 @@ class RawMouse(Extension, QObject,):
         self.addMenuItem(catalog.i18nc("@item:inmenu", "Restart"), self._restart)
         self.addMenuItem(catalog.i18nc("@item:inmenu", "Flip Axes"), self._flipAxes)
         self.addMenuItem(catalog.i18nc("@item:inmenu", "Show Device Information"), self._showDeviceInformation)
+        self.addMenuItem(catalog.i18nc("@item:inmenu", "Dump Flight Recorder"), self._dumpFlightRecorder)
 
         self._buttons = 0
         self._running = False
         self._runner = None
+        self._reader = None
+        self._discovery = None
+        self._hid_dev = None
+        self._hid_handle = None
+        self._reader_process = None
+        self._reader_shm = None
+        self._reader_ring = None
+        self._reader_restarting = False
+        self._first_report_pending = False
+        self._profile = None
+        self._report_decoder = None
         self._battery_level = None
         self._message = None
         self._redraw_pending = False
         self._roll = 0
         self._hidapi = None
+        self._device_name = None
+        self._metrics = Metrics()
+        self._flight_recorder = FlightRecorder()
+        self._last_flight_recorder_dump_at = None
+
+        self._button_defs = {}
+        self._button_actions = deque()
+        self._buttons_pending = False
+        self._button_repeats = {}
+        self._tiltpad_buttons = 0
+        self._button_handlers = {
+            "resetview": self._resetViewButton,
+            "toggleview": self._toggleViewButton,
+            "maxlayer": self._maxLayerButton,
+            "minlayer": self._minLayerButton,
+            "colorscheme": self._colorSchemeButton,
+            "cameramode": self._cameraModeButton,
+            "centerobj": self._centerObjectButton
+        }
 
         self._clearAxisWork()
-        self._clearButtonWork()
 
         self.processAxes.connect(self._processAxes)
         self.processButtons.connect(self._processButtons)
-
+        self.discoveryFinished.connect(self._onDiscoveryFinished)
+        self.restartRequested.connect(self._restart)
+
+        self._reader_timer = QtCore.QTimer(self)
+        self._reader_timer.timeout.connect(self._onReaderTick)
+        self._reader_restart_timer = QtCore.QTimer(self)
+        self._reader_restart_timer.setSingleShot(True)
+        self._reader_restart_timer.timeout.connect(self._startReaderProcess)
+        self._components_timer = QtCore.QTimer(self)
+        self._components_timer.setInterval(100)
+        self._components_timer.timeout.connect(self._getComponents)
+        self._button_repeat_timer = QtCore.QTimer(self)
+        self._button_repeat_timer.setSingleShot(True)
+        self._button_repeat_timer.timeout.connect(self._onButtonRepeat)
+        self._predictor = None
+        self._prediction_timer = QtCore.QTimer(self)
+        self._prediction_timer.setTimerType(QtCore.Qt.PreciseTimer if using_QT5 else QtCore.Qt.TimerType.PreciseTimer)
+        self._prediction_timer.timeout.connect(self._onPredictionTick)
+        self.predictionStarted.connect(self._onPredictionStarted)
+
+        # defer loading the configuration and looking for a device until Cura's startup has progressed
+        # far enough to create the QML engine, it's not needed before there is a window to navigate
+        self._application.engineCreatedSignal.connect(self._onEngineCreated)
+
+        self._metrics.init_time_ms = init_started_at.elapsed()
+        Logger.log("d", "RawMouse initialised in %d ms", self._metrics.init_time_ms)
+
+    def _onEngineCreated(self):
+        self._components_timer.start()
         self._reload(False)
         self._start()
 
     def _getComponents(self):
+        # polled on the GUI thread until the camera tool and the main window exist
         if self._camera_tool is None:
             self._camera_tool = self._controller.getCameraTool()
             self._scene = self._controller.getScene()
         elif self._main_window is None:
-            self._main_window = self._application.getMainWindow()
+            main_window = self._application.getMainWindow()
+            if main_window is not None:
+                self._components_timer.stop()
+                main_window.activeChanged.connect(self._publishGuiState)
+                self._controller.activeStageChanged.connect(self._publishGuiState)
+                self._controller.activeViewChanged.connect(self._publishGuiState)
+                self._scene.getActiveCamera().transformationChanged.connect(self._onCameraChanged)
+                self._main_window = main_window
+                self._publishGuiState()
+
+    def _getModifiers(self):
+        # returns whether ctrl, shift and alt are held down, must be called by the GUI thread
+        modifiers = QtWidgets.QApplication.queryKeyboardModifiers()
+        if using_QT5:
+            ctrl_is_active = (modifiers & QtCore.Qt.ControlModifier) == QtCore.Qt.ControlModifier
+            shift_is_active = (modifiers & QtCore.Qt.ShiftModifier) == QtCore.Qt.ShiftModifier
+            alt_is_active = (modifiers & QtCore.Qt.AltModifier) == QtCore.Qt.AltModifier
+        else:
+            ctrl_is_active = (modifiers & QtCore.Qt.KeyboardModifier.ControlModifier) != QtCore.Qt.KeyboardModifier.NoModifier
+            shift_is_active = (modifiers & QtCore.Qt.KeyboardModifier.ShiftModifier) != QtCore.Qt.KeyboardModifier.NoModifier
+            alt_is_active = (modifiers & QtCore.Qt.KeyboardModifier.AltModifier) != QtCore.Qt.KeyboardModifier.NoModifier
+        return ctrl_is_active, shift_is_active, alt_is_active
+
+    def _publishGuiState(self, *args):
+        stage = self._controller.getActiveStage()
+        view = self._controller.getActiveView()
+        self._gui_state = GuiState(self._main_window is not None and self._main_window.isActive(), self._getScalingDueToZoom(),
+            stage.getPluginId() if stage else "", view.getPluginId() if view else "")
+        if not self._gui_state.window_active and self._button_repeats:
+            # reports are dropped while Cura is inactive so a button released meanwhile would repeat forever
+            self._button_repeats = {}
+            self._button_repeat_timer.stop()
+
+    def _onCameraChanged(self, *args):
+        zoom_scale = self._getScalingDueToZoom()
+        if zoom_scale != self._gui_state.zoom_scale:
+            self._gui_state = self._gui_state._replace(zoom_scale = zoom_scale)
+
+    # emitted by the reader thread so that the restart, which stops the GUI thread's timers, is done by the GUI thread
+    restartRequested = Signal()
 
     def _restart(self):
+        self._metrics.reader_restarts += 1
         self._stop()
         self._reload(True)
         self._start()
@@ -121,6 +250,13 @@ class RawMouse(Extension, QObject,):
             self._auto_fast_view = self._config["fastview"]
         else:
             self._auto_fast_view = 0
+        self._predictor = None
+        if "prediction" in self._config and self._config["prediction"].get("enabled", 0):
+            prediction_hz = int(self._config["prediction"].get("hz", 120))
+            self._prediction_interval = max(1, int(1000 / prediction_hz))
+            # the camera moves by the work values on every update so scale them down to keep the speed the same as at maxhz
+            self._prediction_work_scale = min(1.0, self._prediction_interval / self._min_camera_update_period)
+            self._predictor = MotionPredictor()
         self._axis_threshold = []
         self._axis_scale = []
         self._axis_offset = []
@@ -129,6 +265,10 @@ class RawMouse(Extension, QObject,):
         self._layer_change_increment = 1
         if self._profile_name in self._decoders:
             self._decoder = self._decoders[self._profile_name]
+        elif "reports" in self._profile:
+            self._report_decoder = ReportDecoder.fromProfile(self._profile["reports"])
+            Logger.log("d", "Report layout from profile:\n%s", self._report_decoder.describe())
+            self._decoder = self._decodeReportEvent
         else:
             self._decoder = self._decodeUnknownEvent
         profile_axes = self._profile["axes"]
@@ -142,79 +282,74 @@ class RawMouse(Extension, QObject,):
             self._axis_offset.append(axis_vals["offset"])
             target = ""
             if "target" in axis_vals:
-                target = axis_vals["target"]
-                aliases = {
-                    "rotx": "rotyaw",
-                    "roty": "rotpitch"
-                }
-                if target in aliases:
-                    target = aliases[target]
+                target = AXIS_ALIASES.get(axis_vals["target"], axis_vals["target"])
                 if target == "movy" and axis_vals["scale"] > 0.0:
                     self._layer_change_increment = -1
             self._axis_target.append(target)
             self._axis_value.append(0.0)
             Logger.log("d", "axis %d, scale = %f, threshold = %f, offset = %f, target = %s", i, self._axis_scale[i], self._axis_threshold[i], self._axis_offset[i], self._axis_target[i])
-        # ensure at least 6 axes are defined
+        # ensure at least 6 axes are defined, the missing axes can never exceed their threshold
         while len(self._axis_value) < 6:
+            self._axis_threshold.append(float("inf"))
             self._axis_target.append("")
             self._axis_value.append(0.0)
+        # precomputed axis processing: the axes that can move the camera with their threshold and work vector index
+        # and each axis' scale and offset
+        self._axis_routes = tuple([ (i, self._axis_threshold[i], AXIS_TARGETS.index(self._axis_target[i])) for i in range(0, 6) if self._axis_target[i] in AXIS_TARGETS ])
+        self._cacheAxisTransform()
+        # the tiltpad's button keys are hex masks of its button state, for other devices they are button numbers
+        button_base = 16 if self._decoder == self._decodeTiltpadEvent else 10
+        self._button_defs = {}
+        for b, button_vals in self._profile.get("buttons", {}).items():
+            repeat = button_vals.get("repeat", 0)
+            self._button_defs[int(b, base = button_base)] = ButtonDef(button_vals["target"], button_vals["value"], repeat, button_vals.get("repeat_delay", 500) if repeat else 0)
 
     def _start(self):
+        # device discovery (importing hidapi, enumerating the HID devices and loading libspnav) can be
+        # slow so it is done by a worker thread and the reader is started when that has finished
+        if "metrics" in self._config:
+            self._metrics.startServer(self._config["metrics"])
+        self._started_at = QElapsedTimer()
+        self._started_at.start()
+        self._discovery = Thread(target = self._discover, daemon = True, name = "RawMouseDiscovery")
+        self._discovery.start()
+
+    def _discover(self):
+        discovery_started_at = QElapsedTimer()
+        discovery_started_at.start()
         self._hid_dev = None
+        self._device_name = None
+        self._reader = None
         if "devices" in self._config:
             try:
                 if self._hidapi is None:
-                    pv = ".".join(platform.python_version_tuple()[0:2])
-                    if sys.platform == "linux":
-                        sys_name = "linux-" + os.uname().machine
-                    elif sys.platform == "win32":
-                        sys_name = "win-amd64"
-                    elif sys.platform == "darwin":
-                        sys_name = "macosx-10.13-" + ("intel" if pv == "3.5" else os.uname().machine)
-                    else:
-                        sys_name = "unknown"
-                    hidapi_name = "hidapi-0.9.0-py" + pv + "-" + sys_name
-                    if pv == "3.5" or pv == "3.8":
-                        hidapi_name += ".egg"
-                    sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), "hidapi", hidapi_name))
+                    sys.path.append(ReaderProcess.getHidapiPath())
                     import hid
                     Logger.log("d", "Imported %s", str(hid))
                     self._hidapi = hid
                     del sys.path[-1]
 
-                for hid_dev in self._hidapi.enumerate():
-                    for known_dev in self._config["devices"]:
-                        if hid_dev["vendor_id"] == int(known_dev[0], base = 16) and hid_dev["product_id"] == int(known_dev[1], base = 16):
-                            if len(known_dev) > 4:
-                                options = known_dev[4]
-                                if "platform" in options and platform.system() != options["platform"]:
-                                    continue
-                                if "usage_page" in options and hid_dev["usage_page"] != options["usage_page"]:
-                                    continue
-                                if "usage" in options and hid_dev["usage"] != options["usage"]:
-                                    continue
-                                if "interface_number" in options and hid_dev["interface_number"] != options["interface_number"]:
-                                    continue
+                self._openCachedDevice()
+
+                if self._hid_dev is None:
+                    for hid_dev in self._hidapi.enumerate():
+                        known_dev = self._matchKnownDevice(hid_dev)
+                        if known_dev:
                             self._hid_dev = hid_dev
+                            self._device_name = known_dev[3]
                             Logger.log("d", "Found HID device with vendor_id = %x, product_id = %x, usage_page = %x, usage = %x, interface_number = %x", self._hid_dev["vendor_id"], self._hid_dev["product_id"], self._hid_dev["usage_page"], self._hid_dev["usage"], self._hid_dev["interface_number"])
                             self._cacheProfileValues(known_dev[2])
                             break
-                    if self._hid_dev:
-                        break
             except Exception as e:
                 Logger.log("e", "Exception initialising profile: %s", e)
 
         if self._hid_dev:
-            Logger.log("d", "Starting HID event reader")
-            self._runner = Thread(target = self._run_hid, daemon = True, name = "RawMouse")
-            self._runner.start()
+            self._reader = self._run_hid
         elif "libspnav" in self._config and os.path.exists(self._config["libspnav"]):
             Logger.log("d", "Trying libspnav...")
-            global libspnav
-            if libspnav is None:
+            if Spnav.libspnav is None:
                 try:
-                    libspnav = cdll.LoadLibrary(self._config["libspnav"])
-                    setup_libspnav_fns()
+                    Spnav.loadLibspnav(self._config["libspnav"])
                     Logger.log("d", "Initialised libspnav")
                 except Exception as e:
                     Logger.log("e", "Exception initialising libspnav: %s", e)
@@ -222,16 +357,126 @@ class RawMouse(Extension, QObject,):
                 self._cacheProfileValues("libspnav")
             except Exception as e:
                 Logger.log("e", "Exception initialising profile: %s", e)
-            if libspnav is not None:
-                self._runner = Thread(target = self._run_libspnav, daemon = True, name = "RawMouse")
-                self._runner.start()
-        if self._runner is None:
+            if Spnav.libspnav is not None:
+                self._device_name = "libspnav"
+                self._reader = self._run_libspnav
+        self._metrics.discovery_time_ms = discovery_started_at.elapsed()
+        Logger.log("d", "Device discovery took %d ms", self._metrics.discovery_time_ms)
+        self.discoveryFinished.emit(current_thread())
+
+    discoveryFinished = Signal()
+
+    def _matchKnownDevice(self, hid_dev):
+        for known_dev in self._config["devices"]:
+            if hid_dev["vendor_id"] == int(known_dev[0], base = 16) and hid_dev["product_id"] == int(known_dev[1], base = 16):
+                if len(known_dev) > 4:
+                    options = known_dev[4]
+                    if "platform" in options and platform.system() != options["platform"]:
+                        continue
+                    if "usage_page" in options and hid_dev["usage_page"] != options["usage_page"]:
+                        continue
+                    if "usage" in options and hid_dev["usage"] != options["usage"]:
+                        continue
+                    if "interface_number" in options and hid_dev["interface_number"] != options["interface_number"]:
+                        continue
+                return known_dev
+        return None
+
+    def _getDeviceCachePath(self):
+        return os.path.join(Resources.getDataStoragePath(), "rawmouse_device.json")
+
+    def _openCachedDevice(self):
+        # try the device that was used last time before enumerating all of the HID devices
+        try:
+            with open(self._getDeviceCachePath(), "r", encoding = "utf-8") as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            Logger.log("w", "Exception loading device cache: %s", e)
+            return
+        try:
+            path = bytes.fromhex(cached["path"])
+            # the path may now belong to a different device or a different interface of the same device (e.g. the
+            # hidraw numbers change when devices are plugged in) so check it against the current devices with the
+            # same vendor and product ids, enumerating only those is much quicker than enumerating all the devices
+            hid_dev = None
+            for dev in self._hidapi.enumerate(cached["vendor_id"], cached["product_id"]):
+                if dev["path"] == path:
+                    hid_dev = dev
+                    break
+            if hid_dev is None or any([ hid_dev[key] != cached[key] for key in ("interface_number", "usage_page", "usage", "product_string") ]):
+                Logger.log("d", "Cached device path is now used by a different device")
+                return
+            known_dev = self._matchKnownDevice(hid_dev)
+            if not known_dev or known_dev[2] != cached["profile"] or not path:
+                Logger.log("d", "Device cache does not match the configuration")
+                return
+            h = self._hidapi.device()
+            h.open_path(path)
+        except Exception as e:
+            Logger.log("d", "Cached device could not be opened: %s", e)
+            return
+        self._hid_dev = hid_dev
+        self._hid_handle = h
+        self._device_name = known_dev[3]
+        Logger.log("d", "Opened cached HID device with vendor_id = %x, product_id = %x, interface_number = %x", self._hid_dev["vendor_id"], self._hid_dev["product_id"], self._hid_dev["interface_number"])
+        self._cacheProfileValues(known_dev[2])
+
+    def _saveDeviceCache(self):
+        if not self._hid_dev["path"]:
+            return
+        cached = {
+            "path": self._hid_dev["path"].hex(),
+            "profile": self._profile_name
+        }
+        for key in ("vendor_id", "product_id", "usage_page", "usage", "interface_number", "manufacturer_string", "product_string"):
+            cached[key] = self._hid_dev[key]
+        try:
+            with open(self._getDeviceCachePath(), "w", encoding = "utf-8") as f:
+                json.dump(cached, f)
+        except Exception as e:
+            Logger.log("w", "Exception saving device cache: %s", e)
+
+    def _onDiscoveryFinished(self, discovery):
+        # ignore the result of a discovery that has been superseded by _stop()
+        if discovery is not self._discovery:
+            return
+        self._discovery = None
+        if self._reader is None:
             Logger.log("w", "No mouse found!")
+            return
+        self._metrics.addDevice(self._device_name)
+        if self._useReaderProcess():
+            self._startReaderProcess()
+            return
+        Logger.log("d", "Starting %s event reader", "HID" if self._hid_dev else "libspnav")
+        self._runner = Thread(target = self._reader, daemon = True, name = "RawMouse")
+        self._runner.start()
 
     def _stop(self):
+        if self._discovery:
+            discovery = self._discovery
+            self._discovery = None
+            discovery.join()
         self._running = False
         while self._runner:
             self._runner.join(timeout = 2.0)
+        self._reader_restart_timer.stop()
+        self._reader_restarting = False
+        self._prediction_timer.stop()
+        self._stopReaderProcess()
+        # a button that is held when the reader stops never gets its release
+        self._button_actions.clear()
+        self._buttons_pending = False
+        self._button_repeats = {}
+        self._button_repeat_timer.stop()
+        self._tiltpad_buttons = 0
+        # close a device opened by a discovery whose reader was never started
+        if self._hid_handle is not None:
+            self._hid_handle.close()
+            self._hid_handle = None
+        self._metrics.stopServer()
 
     def _run_hid(self):
         Logger.log("d", "HID event reader running...")
@@ -240,32 +485,48 @@ class RawMouse(Extension, QObject,):
         auto_restart = False
         self._running = True
         try:
-            h = self._hidapi.device()
-            if self._hid_dev["path"]:
-                Logger.log("d", "Trying to open %s", self._hid_dev["path"].decode("utf-8"))
-                h.open_path(self._hid_dev["path"])
-            else:
-                Logger.log("d", "Trying to open [%x,%x]", self._hid_dev["vendor_id"], self._hid_dev["product_id"])
-                h.open(self._hid_dev["vendor_id"], self._hid_dev["product_id"])
+            h = self._hid_handle
+            self._hid_handle = None
+            if h is None:
+                h = self._hidapi.device()
+                if self._hid_dev["path"]:
+                    Logger.log("d", "Trying to open %s", self._hid_dev["path"].decode("utf-8"))
+                    h.open_path(self._hid_dev["path"])
+                else:
+                    Logger.log("d", "Trying to open [%x,%x]", self._hid_dev["vendor_id"], self._hid_dev["product_id"])
+                    h.open(self._hid_dev["vendor_id"], self._hid_dev["product_id"])
+                self._saveDeviceCache()
 
             Logger.log("i", "Manufacturer: %s", h.get_manufacturer_string())
             Logger.log("i", "Product: %s", h.get_product_string())
             #Logger.log("i", "Serial No: %s", h.get_serial_number_string())
 
+            if self._decoder == self._decodeUnknownEvent:
+                self._loadReportDescriptor(h)
+
             self._last_camera_update_at = QElapsedTimer()
             self._last_camera_update_at.start()
             self._fast_view = False
+            reports_read = self._metrics.reports_read
+            device_name = self._device_name
+            first_report_pending = True
             while self._running:
                 if self._main_window:
                     d = h.read(64, 50 if self._fast_view else 1000)
                     if d:
-                        if self._main_window.isActive():
+                        if first_report_pending:
+                            first_report_pending = False
+                            self._metrics.first_report_ms = self._started_at.elapsed()
+                            Logger.log("d", "First report read %d ms after start", self._metrics.first_report_ms)
+                        reports_read[device_name] += 1
+                        if self._gui_state.window_active:
                             self._decoder(d)
+                        else:
+                            self._metrics.dropped_samples += 1
                     elif self._fast_view:
-                        self._controller.setActiveView("SimulationView")
+                        self._setActiveView("SimulationView")
                         self._fast_view = False
                 else:
-                    self._getComponents()
                     time.sleep(0.1)
             h.close()
         except IOError as e:
@@ -273,6 +534,7 @@ class RawMouse(Extension, QObject,):
             auto_restart = (sys.platform == "win32")
         except Exception as e:
             Logger.log("e", "Exception while reading HID events: %s", e)
+            self._dumpFlightRecorder("HID reader exception")
         self._running = False
         if auto_restart:
             # throttle restarts to avoid hogging the CPU
@@ -283,179 +545,416 @@ class RawMouse(Extension, QObject,):
                 time.sleep(min_restart_seconds - run_time)
             if not self._running:
                 self._runner = None
-                self._restart()
+                self.restartRequested.emit()
         else:
             self._runner = None
 
-    def _clearAxisWork(self):
-        self._axis_work = {
-            "movx": 0.0,
-            "movy": 0.0,
-            "rotyaw": 0.0,
-            "rotpitch": 0.0,
-            "rotroll": 0.0,
-            "zoom": 0.0
-        }
+    def _getReaderPython(self):
+        options = self._config["reader_process"]
+        if "python" in options:
+            return options["python"]
+        if getattr(sys, "frozen", False):
+            # sys.executable is Cura itself
+            return None
+        return sys.executable
+
+    def _useReaderProcess(self):
+        if "reader_process" not in self._config or not self._config["reader_process"].get("enabled", 0):
+            return False
+        if ReaderProcess.shared_memory is None:
+            Logger.log("w", "The reader process requires Python 3.8 or later")
+        elif self._hid_dev and self._profile_name not in ReaderProcess.PROFILES:
+            Logger.log("w", "Profile %s is not supported by the reader process", self._profile_name)
+        elif self._getReaderPython() is None:
+            Logger.log("w", "The reader process requires a Python interpreter, set reader_process/python in config.json")
+        else:
+            return True
+        Logger.log("d", "Reading events in Cura's process")
+        return False
+
+    def _startReaderProcess(self):
+        if self._hid_handle is not None:
+            # the reader process opens the device itself
+            self._hid_handle.close()
+            self._hid_handle = None
+        capacity = 256
+        try:
+            self._reader_shm = ReaderProcess.shared_memory.SharedMemory(create = True, size = ReaderProcess.FrameRing.getSize(capacity))
+            self._reader_ring = ReaderProcess.FrameRing(self._reader_shm.buf, capacity)
+            options = {
+                "shm": self._reader_shm.name,
+                "backend": "hid" if self._hid_dev else "libspnav"
+            }
+            if self._hid_dev:
+                options["path"] = self._hid_dev["path"].hex() if self._hid_dev["path"] else ""
+                options["vendor_id"] = self._hid_dev["vendor_id"]
+                options["product_id"] = self._hid_dev["product_id"]
+                options["profile"] = self._profile_name
+            else:
+                options["libspnav"] = self._config["libspnav"]
+            Logger.log("d", "Starting %s reader process", options["backend"])
+            # the reader process exits when its stdin is closed, which also happens if Cura dies
+            self._reader_process = subprocess.Popen([ self._getReaderPython(), os.path.join(os.path.dirname(os.path.realpath(__file__)), "ReaderProcess.py"), json.dumps(options) ],
+                stdin = subprocess.PIPE, stdout = subprocess.DEVNULL, stderr = subprocess.PIPE,
+                creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        except Exception as e:
+            Logger.log("e", "Exception starting reader process: %s", e)
+            self._stopReaderProcess()
+            return
+        self._reader_started_at = QElapsedTimer()
+        self._reader_started_at.start()
+        if self._reader_restarting:
+            # time the first report from the automatic restart rather than from the last start
+            self._reader_restarting = False
+            self._started_at.start()
+        self._first_report_pending = True
+        self._reader_heartbeat = -1
+        self._reader_heartbeat_at = QElapsedTimer()
+        self._reader_heartbeat_at.start()
+        self._reader_reports = 0
+        self._reader_decode_errors = 0
+        self._reader_running = False
+        self._last_report_at = QElapsedTimer()
+        self._last_report_at.start()
+        self._last_camera_update_at = QElapsedTimer()
+        self._last_camera_update_at.start()
+        self._fast_view = False
+        self._reader_timer.start(max(1, int(self._min_camera_update_period / 2)))
+
+    def _stopReaderProcess(self):
+        self._reader_timer.stop()
+        if self._reader_process is not None:
+            self._reader_ring.requestStop()
+            try:
+                self._reader_process.wait(timeout = 2.0)
+            except subprocess.TimeoutExpired:
+                self._reader_process.kill()
+                self._reader_process.wait()
+            self._reader_process.stdin.close()
+            self._reader_process = None
+        if self._reader_shm is not None:
+            if self._reader_ring is not None:
+                self._reader_ring.release()
+                self._reader_ring = None
+            self._reader_shm.close()
+            self._reader_shm.unlink()
+            self._reader_shm = None
+
+    def _restartReaderProcess(self):
+        self._metrics.reader_restarts += 1
+        run_time = self._reader_started_at.elapsed()
+        self._stopReaderProcess()
+        self._reader_restarting = True
+        # throttle restarts to avoid hogging the CPU
+        min_restart_ms = 5000
+        self._reader_restart_timer.start(max(0, min_restart_ms - run_time))
+
+    def _onReaderTick(self):
+        if self._main_window is None:
+            return
+        heartbeat, reports, decode_errors, status, battery_level = self._reader_ring.getState()
+        if self._reader_process.poll() is not None or status == ReaderProcess.STATUS_FAILED:
+            self._reader_process.wait()
+            Logger.log("e", "Reader process failed: %s", self._reader_process.stderr.read().decode("utf-8", "replace"))
+            self._restartReaderProcess()
+            return
+        if heartbeat != self._reader_heartbeat:
+            self._reader_heartbeat = heartbeat
+            self._reader_heartbeat_at.start()
+        elif self._reader_heartbeat_at.elapsed() > 3000:
+            Logger.log("e", "Reader process is not responding")
+            self._restartReaderProcess()
+            return
+        if status == ReaderProcess.STATUS_RUNNING and not self._reader_running:
+            self._reader_running = True
+            if self._hid_dev:
+                self._saveDeviceCache()
+        self._metrics.reports_read[self._device_name] += reports - self._reader_reports
+        self._metrics.decode_errors += decode_errors - self._reader_decode_errors
+        self._reader_reports = reports
+        self._reader_decode_errors = decode_errors
+        if battery_level >= 0 and battery_level != self._battery_level:
+            self._battery_level = battery_level
+            self._metrics.battery_level = battery_level
+            Logger.log("d", "Spacemouse battery level %d%%", battery_level)
+
+        frames, dropped = self._reader_ring.read()
+        self._metrics.dropped_samples += dropped
+        if not frames:
+            if self._fast_view and self._last_report_at.elapsed() > 50:
+                self._setActiveView("SimulationView")
+                self._fast_view = False
+            return
+        if self._first_report_pending:
+            self._first_report_pending = False
+            self._metrics.first_report_ms = self._started_at.elapsed()
+            Logger.log("d", "First report read %d ms after start", self._metrics.first_report_ms)
+        self._last_report_at.start()
+        if not self._gui_state.window_active:
+            self._metrics.dropped_samples += len(frames)
+            return
+        # only the most recent axis values are used, button edges are all processed in order
+        axes = None
+        for frame in frames:
+            if frame[7] == ReaderProcess.FRAME_AXES:
+                if axes is not None:
+                    self._metrics.coalesced_samples += 1
+                axes = frame[1:7]
+            else:
+                self._mouseButtonEvent(frame[8], frame[9])
+        if axes is not None:
+            self._axis_value[0:6] = [ v * k + o for v, (k, o) in zip(axes, self._axis_transform) ]
+            self._mouseAxisEvent(self._axis_value)
 
-    def _clearButtonWork(self):
-        self._button_work = {
-            "resetview": None,
-            "toggleview": None,
-            "maxlayer": None,
-            "minlayer": None,
-            "colorscheme": None,
-            "cameramode": None,
-            "centerobj": None
-        }
+    def _clearAxisWork(self):
+        # indexed by MOVX, MOVY, ROTYAW, ROTPITCH, ROTROLL and ZOOM
+        self._axis_work = [ 0.0 ] * 6
 
     processAxes = Signal()
 
     processButtons = Signal()
 
+    def _queueButtonAction(self, action):
+        # called by the reader, a single dispatch processes all the actions queued before it runs
+        self._button_actions.append(action)
+        if not self._buttons_pending:
+            self._buttons_pending = True
+            self._metrics.process_buttons_dispatches += 1
+            self.processButtons.emit()
+
     def _processButtons(self):
-        try:
-            modifiers = QtWidgets.QApplication.queryKeyboardModifiers()
-            if using_QT5:
-                shift_is_active = (modifiers & QtCore.Qt.ShiftModifier) == QtCore.Qt.ShiftModifier
+        # clear the flag before draining the queue so that an action queued while draining gets another dispatch
+        self._buttons_pending = False
+        actions = []
+        while self._button_actions:
+            action = self._button_actions.popleft()
+            button_def = self._button_defs.get(action.button)
+            if action.target is None:
+                self._button_repeats.pop(action.button, None)
+                continue
+            if button_def is not None and button_def.repeat:
+                self._button_repeats[action.button] = (action, time.monotonic() + button_def.repeat_delay / 1000)
+            actions.append(action)
+        self._runButtonActions(actions)
+        self._scheduleButtonRepeat()
+
+    def _onButtonRepeat(self):
+        now = time.monotonic()
+        actions = []
+        for button, (action, due) in list(self._button_repeats.items()):
+            button_def = self._button_defs.get(button)
+            if button_def is None or not button_def.repeat:
+                # the profile has been reloaded
+                del self._button_repeats[button]
+            elif now >= due:
+                actions.append(action)
+                # don't try to catch up if Cura was too busy to repeat on time
+                self._button_repeats[button] = (action, max(due, now - 0.5) + button_def.repeat / 1000)
+        self._runButtonActions(actions)
+        self._scheduleButtonRepeat()
+
+    def _scheduleButtonRepeat(self):
+        if self._button_repeats:
+            due = min([ due for action, due in self._button_repeats.values() ])
+            self._button_repeat_timer.start(max(0, int((due - time.monotonic()) * 1000)))
+        else:
+            self._button_repeat_timer.stop()
+
+    def _runButtonActions(self, actions):
+        # consecutive integer layer changes are merged so that a burst of presses only moves the layer slider once
+        merged = []
+        for action in actions:
+            if merged and action.target in ("maxlayer", "minlayer") and merged[-1].target == action.target and \
+                    isinstance(action.value, int) and isinstance(merged[-1].value, int):
+                merged[-1] = merged[-1]._replace(value = merged[-1].value + action.value)
             else:
-                shift_is_active = (modifiers & QtCore.Qt.KeyboardModifier.ShiftModifier) != QtCore.Qt.KeyboardModifier.NoModifier
-            current_view = self._controller.getActiveView()
-            if self._button_work["resetview"]:
-                self._roll = 0
-                self._controller.setCameraRotation(*self._button_work["resetview"])
-            elif self._button_work["toggleview"]:
-                if self._controller.getActiveStage().getPluginId() == "PreviewStage":
-                    self._lastPreviewStageView = self._controller.getActiveView().getPluginId()
-                    self._controller.setActiveStage("PrepareStage")
-                    self._controller.setActiveView("SolidView")
-                else:
-                    self._controller.setActiveStage("PreviewStage")
-                    self._controller.setActiveView(self._lastPreviewStageView)
-            elif self._button_work["maxlayer"]:
-                if current_view.getPluginId() == "SimulationView":
-                    layer = self._button_work["maxlayer"]
-                    if layer == "max":
-                        current_view.setLayer(current_view.getMaxLayers())
-                    elif layer == "min":
-                        current_view.setLayer(0)
-                    elif isinstance(layer, int):
-                        delta = layer * (10 if shift_is_active else 1)
-                        current_view.setLayer(current_view.getCurrentLayer() + delta)
-            elif self._button_work["minlayer"]:
-                if current_view.getPluginId() == "SimulationView":
-                    layer = self._button_work["minlayer"]
-                    if layer == "max":
-                        current_view.setMinimumLayerLayer(current_view.getMaxLayers())
-                    elif layer == "min":
-                        current_view.setMinimumLayer(0)
-                    elif isinstance(layer, int):
-                        delta = layer * (10 if shift_is_active else 1)
-                        current_view.setMinimumLayer(current_view.getMinimumLayer() + delta)
-            elif isinstance(self._button_work["colorscheme"], int):
-                if current_view.getPluginId() == "SimulationView":
-                    color_scheme = self._button_work["colorscheme"]
-                    if color_scheme >= 0 and color_scheme <= 3:
-                        self._application.getPreferences().setValue("layerview/layer_view_type", color_scheme)
-            elif self._button_work["colorscheme"]:
-                if current_view.getPluginId() == "SimulationView":
-                    if self._button_work["colorscheme"] == "next":
-                        color_scheme = current_view.getSimulationViewType() + 1
-                        if color_scheme > 3:
-                            color_scheme = 0
-                        self._application.getPreferences().setValue("layerview/layer_view_type", color_scheme)
-                    elif self._button_work["colorscheme"] == "prev":
-                        color_scheme = current_view.getSimulationViewType() - 1
-                        if color_scheme < 0:
-                            color_scheme = 3
-                        self._application.getPreferences().setValue("layerview/layer_view_type", color_scheme)
-            elif self._button_work["cameramode"]:
-                camera_mode = self._button_work["cameramode"]
-                if camera_mode != "perspective" and camera_mode != "orthographic":
-                    camera_mode = self._application.getPreferences().getValue("general/camera_perspective_mode")
-                    camera_mode = "perspective" if camera_mode == "orthographic" else "orthographic"
-                self._application.getPreferences().setValue("general/camera_perspective_mode", camera_mode)
-            elif self._button_work["centerobj"]:
-                bb = None
-                if Selection.getSelectedObject(0):
-                    bb = Selection.getSelectedObject(0).getBoundingBox()
-                else:
-                    for node in DepthFirstIterator(self._scene.getRoot()):
-                        if isinstance(node, SceneNode) and node.getMeshData() and node.isSelectable():
-                            bb = (bb + node.getBoundingBox()) if bb is not None else node.getBoundingBox()
-                if bb:
-                    self._camera_tool.setOrigin(bb.center)
-                    camera = self._scene.getActiveCamera()
-                    camera_pos = camera.getWorldPosition()
-                    #Logger.log("d", "Camera pos = " + str(camera_pos))
-                    if camera_pos.y < 0:
-                        camera.setPosition(Vector(camera_pos.x, bb.height, camera_pos.z))
-                        camera.lookAt(bb.center)
-                    if isinstance(self._button_work["centerobj"], float):
-                        # simple fit object to screen based on object's longest dimension
-                        target_size = max(bb.height, bb.width, bb.depth, 40)
-                        if camera.isPerspective():
-                            #Logger.log("d", "target at " + str(bb.center) + ", camera at " + str(camera.getWorldPosition()))
-                            move_vector = (camera.getWorldPosition() - bb.center).normalized() * target_size * 2 / self._button_work["centerobj"]
-                            #Logger.log("d", "target size is " + str(target_size) + " move vector is " + str(move_vector))
-                            camera.setPosition(bb.center + move_vector)
-                        else:
-                            zoom_factor = camera.getDefaultZoomFactor() * (1 + 3.0 * self._button_work["centerobj"] / math.sqrt(target_size))
-                            if zoom_factor > 1:
-                                zoom_factor = 1
-                            elif zoom_factor < -0.495:
-                                zoom_factor = -0.495
-                            #Logger.log("d", "zoom factor is " + str(zoom_factor))
-                            camera.setZoomFactor(zoom_factor)
+                merged.append(action)
+        for action in merged:
+            handler = self._button_handlers.get(action.target)
+            if handler is None:
+                continue
+            try:
+                handler(action.value)
+            except Exception as e:
+                Logger.log("e", "Exception while processing button %s: %s", action.target, e)
+                self._dumpFlightRecorder("processButtons exception")
+
+    def _resetViewButton(self, value):
+        if value:
+            self._roll = 0
+            self._controller.setCameraRotation(*value)
+
+    def _toggleViewButton(self, value):
+        if not value:
+            return
+        if self._controller.getActiveStage().getPluginId() == "PreviewStage":
+            self._lastPreviewStageView = self._controller.getActiveView().getPluginId()
+            self._controller.setActiveStage("PrepareStage")
+            self._setActiveView("SolidView")
+        else:
+            self._controller.setActiveStage("PreviewStage")
+            self._setActiveView(self._lastPreviewStageView)
+
+    def _maxLayerButton(self, value):
+        current_view = self._controller.getActiveView()
+        if value and current_view.getPluginId() == "SimulationView":
+            if value == "max":
+                current_view.setLayer(current_view.getMaxLayers())
+            elif value == "min":
+                current_view.setLayer(0)
+            elif isinstance(value, int):
+                delta = value * (10 if self._getModifiers()[1] else 1)
+                current_view.setLayer(current_view.getCurrentLayer() + delta)
+
+    def _minLayerButton(self, value):
+        current_view = self._controller.getActiveView()
+        if value and current_view.getPluginId() == "SimulationView":
+            if value == "max":
+                current_view.setMinimumLayer(current_view.getMaxLayers())
+            elif value == "min":
+                current_view.setMinimumLayer(0)
+            elif isinstance(value, int):
+                delta = value * (10 if self._getModifiers()[1] else 1)
+                current_view.setMinimumLayer(current_view.getMinimumLayer() + delta)
+
+    def _colorSchemeButton(self, value):
+        current_view = self._controller.getActiveView()
+        if current_view.getPluginId() != "SimulationView":
+            return
+        if isinstance(value, int):
+            if value >= 0 and value <= 3:
+                self._application.getPreferences().setValue("layerview/layer_view_type", value)
+        elif value == "next":
+            color_scheme = current_view.getSimulationViewType() + 1
+            if color_scheme > 3:
+                color_scheme = 0
+            self._application.getPreferences().setValue("layerview/layer_view_type", color_scheme)
+        elif value == "prev":
+            color_scheme = current_view.getSimulationViewType() - 1
+            if color_scheme < 0:
+                color_scheme = 3
+            self._application.getPreferences().setValue("layerview/layer_view_type", color_scheme)
+
+    def _cameraModeButton(self, value):
+        if not value:
+            return
+        camera_mode = value
+        if camera_mode != "perspective" and camera_mode != "orthographic":
+            camera_mode = self._application.getPreferences().getValue("general/camera_perspective_mode")
+            camera_mode = "perspective" if camera_mode == "orthographic" else "orthographic"
+        self._application.getPreferences().setValue("general/camera_perspective_mode", camera_mode)
+
+    def _centerObjectButton(self, value):
+        if not value:
+            return
+        bb = None
+        if Selection.getSelectedObject(0):
+            bb = Selection.getSelectedObject(0).getBoundingBox()
+        else:
+            for node in DepthFirstIterator(self._scene.getRoot()):
+                if isinstance(node, SceneNode) and node.getMeshData() and node.isSelectable():
+                    bb = (bb + node.getBoundingBox()) if bb is not None else node.getBoundingBox()
+        if bb:
+            self._camera_tool.setOrigin(bb.center)
+            camera = self._scene.getActiveCamera()
+            camera_pos = camera.getWorldPosition()
+            #Logger.log("d", "Camera pos = " + str(camera_pos))
+            if camera_pos.y < 0:
+                camera.setPosition(Vector(camera_pos.x, bb.height, camera_pos.z))
+                camera.lookAt(bb.center)
+            if isinstance(value, float):
+                # simple fit object to screen based on object's longest dimension
+                target_size = max(bb.height, bb.width, bb.depth, 40)
+                if camera.isPerspective():
+                    #Logger.log("d", "target at " + str(bb.center) + ", camera at " + str(camera.getWorldPosition()))
+                    move_vector = (camera.getWorldPosition() - bb.center).normalized() * target_size * 2 / value
+                    #Logger.log("d", "target size is " + str(target_size) + " move vector is " + str(move_vector))
+                    camera.setPosition(bb.center + move_vector)
                 else:
-                    self._controller.setCameraRotation("3d", 0)
-                self._roll = 0
-        except Exception as e:
-            Logger.log("e", "Exception while processing buttons: %s", e)
-        self._clearButtonWork()
+                    zoom_factor = camera.getDefaultZoomFactor() * (1 + 3.0 * value / math.sqrt(target_size))
+                    if zoom_factor > 1:
+                        zoom_factor = 1
+                    elif zoom_factor < -0.495:
+                        zoom_factor = -0.495
+                    #Logger.log("d", "zoom factor is " + str(zoom_factor))
+                    camera.setZoomFactor(zoom_factor)
+        else:
+            self._controller.setCameraRotation("3d", 0)
+        self._roll = 0
 
     def _processAxes(self):
         try:
-            modifiers = QtWidgets.QApplication.queryKeyboardModifiers()
-            if using_QT5:
-                ctrl_is_active = (modifiers & QtCore.Qt.ControlModifier) == QtCore.Qt.ControlModifier
-                shift_is_active = (modifiers & QtCore.Qt.ShiftModifier) == QtCore.Qt.ShiftModifier
-                alt_is_active = (modifiers & QtCore.Qt.AltModifier) == QtCore.Qt.AltModifier
-            else:
-                ctrl_is_active = (modifiers & QtCore.Qt.KeyboardModifier.ControlModifier) != QtCore.Qt.KeyboardModifier.NoModifier
-                shift_is_active = (modifiers & QtCore.Qt.KeyboardModifier.ShiftModifier) != QtCore.Qt.KeyboardModifier.NoModifier
-                alt_is_active = (modifiers & QtCore.Qt.KeyboardModifier.AltModifier) != QtCore.Qt.KeyboardModifier.NoModifier
-            current_view = self._controller.getActiveView()
-            if self._last_camera_update_at.elapsed() > self._min_camera_update_period:
-                if self._auto_fast_view or ctrl_is_active:
-                    if self._controller.getActiveStage().getPluginId() == "PreviewStage" and self._controller.getActiveView().getPluginId() == "SimulationView":
-                        self._controller.setActiveView("FastView")
-                        self._fast_view = True
-                elif self._fast_view:
-                    self._controller.setActiveView("SimulationView")
-                    self._fast_view = False
-                if (shift_is_active or alt_is_active) and current_view.getPluginId() == "SimulationView":
-                    if self._axis_work["movy"] != 0.0:
-                        delta = self._layer_change_increment if self._axis_work["movy"] > 0 else -self._layer_change_increment
-                        self._last_camera_update_at.start()
-                        if shift_is_active:
-                            current_view.setLayer(current_view.getCurrentLayer() + delta)
-                        if alt_is_active:
-                            current_view.setMinimumLayer(current_view.getMinimumLayer() + delta)
-                else:
-                    if self._axis_work["movx"] != 0.0 or self._axis_work["movy"] != 0.0:
-                        self._last_camera_update_at.start()
-                        self._camera_tool._moveCamera(MouseEvent(MouseEvent.MouseMoveEvent, self._axis_work["movx"], self._axis_work["movy"], 0, 0))
-                    if self._axis_work["rotyaw"] != 0 or self._axis_work["rotpitch"] != 0  or self._axis_work["rotroll"] != 0:
-                        self._last_camera_update_at.start()
-                        self._rotateCamera(self._axis_work["rotyaw"], self._axis_work["rotpitch"], self._axis_work["rotroll"])
-                    if self._axis_work["zoom"] != 0:
-                        self._last_camera_update_at.start()
-                        self._camera_tool._zoomCamera(self._axis_work["zoom"])
+            self._updateCamera(self._axis_work, False)
         except Exception as e:
             Logger.log("e", "Exception while processing axes: %s", e)
+            self._dumpFlightRecorder("processAxes exception")
+        # an orthographic zoom doesn't change the camera's transformation so pick it up here
+        self._onCameraChanged()
         self._redraw_pending = False
         self._clearAxisWork()
 
+    predictionStarted = Signal()
+
+    def _onPredictionStarted(self):
+        if not self._prediction_timer.isActive():
+            self._prediction_timer.start(self._prediction_interval)
+
+    def _onPredictionTick(self):
+        work = self._predictor.predict(time.monotonic())
+        if work is None:
+            self._prediction_timer.stop()
+            error, latency = self._predictor.getStats()
+            self._metrics.prediction_error = error
+            self._metrics.prediction_latency_ms = latency
+            if self._verbose > 0:
+                Logger.log("d", "Prediction error %.1f%%, hidden latency %.1f ms", error * 100, latency)
+            return
+        try:
+            scale = self._prediction_work_scale
+            self._updateCamera([ w * scale for w in work ], True)
+        except Exception as e:
+            Logger.log("e", "Exception while processing axes: %s", e)
+            self._dumpFlightRecorder("processAxes exception")
+        self._onCameraChanged()
+
+    def _updateCamera(self, work, predicted):
+        # predicted updates are paced by the prediction timer rather than limited to maxhz, except for the layer changes
+        gui_state = self._gui_state
+        ctrl_is_active, shift_is_active, alt_is_active = self._getModifiers()
+        current_view = self._controller.getActiveView()
+        max_hz_elapsed = self._last_camera_update_at.elapsed() > self._min_camera_update_period
+        if predicted or max_hz_elapsed:
+            update_started_at = time.perf_counter()
+            if self._auto_fast_view or ctrl_is_active:
+                if gui_state.stage_id == "PreviewStage" and gui_state.view_id == "SimulationView":
+                    self._setActiveView("FastView")
+                    self._fast_view = True
+            elif self._fast_view:
+                self._setActiveView("SimulationView")
+                self._fast_view = False
+            if (shift_is_active or alt_is_active) and current_view.getPluginId() == "SimulationView":
+                if work[MOVY] != 0.0 and max_hz_elapsed:
+                    delta = self._layer_change_increment if work[MOVY] > 0 else -self._layer_change_increment
+                    self._last_camera_update_at.start()
+                    if shift_is_active:
+                        current_view.setLayer(current_view.getCurrentLayer() + delta)
+                    if alt_is_active:
+                        current_view.setMinimumLayer(current_view.getMinimumLayer() + delta)
+            else:
+                if work[MOVX] != 0.0 or work[MOVY] != 0.0:
+                    self._last_camera_update_at.start()
+                    self._camera_tool._moveCamera(MouseEvent(MouseEvent.MouseMoveEvent, work[MOVX], work[MOVY], 0, 0))
+                if work[ROTYAW] != 0 or work[ROTPITCH] != 0  or work[ROTROLL] != 0:
+                    self._last_camera_update_at.start()
+                    self._rotateCamera(work[ROTYAW], work[ROTPITCH], work[ROTROLL])
+                if work[ZOOM] != 0:
+                    self._last_camera_update_at.start()
+                    self._camera_tool._zoomCamera(work[ZOOM])
+            self._flight_recorder.record(FlightRecorder.CAMERA, FlightRecorder.getViewState(current_view.getPluginId(), self._fast_view), self._axis_value,
+                work, (time.perf_counter() - update_started_at) * 1000)
+        else:
+            self._metrics.dropped_samples += 1
+
     def _decodeSpacemouseEvent(self, buf):
         scale = 1.0 / 350.0
         if len(buf) == 7 and (buf[0] == 1 or buf[0] == 2):
@@ -483,38 +982,50 @@ class RawMouse(Extension, QObject,):
         elif len(buf) >= 3 and buf[0] == 0x17:
             if buf[1] != self._battery_level:
                 self._battery_level = buf[1]
+                self._metrics.battery_level = buf[1]
                 Logger.log("d", "Spacemouse battery level %d%%", buf[1])
         else:
+            self._metrics.decode_errors += 1
             Logger.log("d", "Unknown spacemouse event: code = %x, len = %d", buf[0], len(buf))
 
     def _mouseAxisEvent(self, vals):
         if self._verbose > 0:
             Logger.log("d", "Axes [%f,%f,%f,%f,%f,%f]", vals[0], vals[1], vals[2], vals[3], vals[4], vals[5])
         process = False
-        scale = self._getScalingDueToZoom()
-        for i in range(0, 6):
-            if vals[i] > self._axis_threshold[i]:
-                self._axis_work[self._axis_target[i]] = (vals[i] - self._axis_threshold[i]) * scale
+        scale = self._gui_state.zoom_scale
+        work = self._axis_work
+        for i, threshold, t in self._axis_routes:
+            val = vals[i]
+            if val > threshold:
+                work[t] = (val - threshold) * scale
                 process = True
-            elif vals[i] < -self._axis_threshold[i]:
-                self._axis_work[self._axis_target[i]] = (vals[i] + self._axis_threshold[i]) * scale
+            elif val < -threshold:
+                work[t] = (val + threshold) * scale
                 process = True
+        self._flight_recorder.record(FlightRecorder.AXES, FlightRecorder.FAST_VIEW if self._fast_view else 0, vals, work)
+        if self._predictor is not None:
+            # the camera is updated by the prediction timer, an all zero work vector stops the motion
+            if self._predictor.update(time.monotonic(), tuple(work)):
+                self.predictionStarted.emit()
+            self._clearAxisWork()
+            return
         if process:
             if not self._redraw_pending:
                 self._redraw_pending = True
+                self._metrics.process_axes_dispatches += 1
                 self.processAxes.emit()
+            else:
+                self._metrics.coalesced_samples += 1
 
     def _mouseButtonEvent(self, button, val):
         if self._verbose > 0:
             Logger.log("d", "button[%d] = %f", button, val)
-        if val == 1:
-            if "buttons" in self._profile:
-                button_defs = self._profile["buttons"]
-                for b in button_defs:
-                    if button == int(b):
-                        self._button_work[button_defs[b]["target"]] = button_defs[b]["value"]
-                        self.processButtons.emit()
-                        return
+        button_def = self._button_defs.get(button)
+        if button_def is not None:
+            if val == 1:
+                self._queueButtonAction(ButtonAction(button, button_def.target, button_def.value))
+            elif button_def.repeat:
+                self._queueButtonAction(ButtonAction(button, None, None))
 
     def _decodeOS3MEvent(self, buf):
         scale = 1.0 / 350.0
@@ -526,41 +1037,95 @@ class RawMouse(Extension, QObject,):
                 self._axis_value[a] = val * scale * self._axis_scale[a] + self._axis_offset[a]
             self._mouseAxisEvent(self._axis_value)
         else:
+            self._metrics.decode_errors += 1
             Logger.log("d", "Unknown OS3M event: len = %d", len(buf))
 
     def _decodeTiltpadEvent(self, buf):
-        scale = self._getScalingDueToZoom()
+        scale = self._gui_state.zoom_scale
         process_axes = False
+        work = self._axis_work
         #tilt
         for a in range(0, 2):
             val = (buf[a] - 127) * self._axis_scale[a] + self._axis_offset[a]
-            if val > self._axis_threshold[a]:
-                self._axis_work[self._axis_target[a]] = (val - self._axis_threshold[a]) * scale
+            self._axis_value[a] = val
+        for a, threshold, t in self._axis_routes:
+            val = self._axis_value[a]
+            if val > threshold:
+                work[t] = (val - threshold) * scale
                 process_axes = True
-            elif val < -self._axis_threshold[a]:
-                self._axis_work[self._axis_target[a]] = (val + self._axis_threshold[a]) * scale
+            elif val < -threshold:
+                work[t] = (val + threshold) * scale
                 process_axes = True
+        # the button state is matched as a whole and the button acts when the state changes
+        buttons = buf[3] & 0x7f
+        button_def = self._button_defs.get(buttons)
+        if buttons != self._tiltpad_buttons:
+            last_def = self._button_defs.get(self._tiltpad_buttons)
+            if last_def is not None and last_def.repeat:
+                self._queueButtonAction(ButtonAction(self._tiltpad_buttons, None, None))
+            if button_def is not None:
+                self._queueButtonAction(ButtonAction(buttons, button_def.target, button_def.value))
+            self._tiltpad_buttons = buttons
+        self._flight_recorder.record(FlightRecorder.AXES, FlightRecorder.FAST_VIEW if self._fast_view else 0, self._axis_value, work)
         if process_axes:
             if not self._redraw_pending:
                 self._redraw_pending = True
+                self._metrics.process_axes_dispatches += 1
                 self.processAxes.emit()
-        buttons = buf[3] & 0x7f
-        if buttons != 0:
-            if "buttons" in self._profile:
-                button_defs = self._profile["buttons"]
-                for b in button_defs:
-                    if buttons == int(b, base = 16):
-                        self._button_work[button_defs[b]["target"]] = button_defs[b]["value"]
-                        self.processButtons.emit()
-                        return
+            else:
+                self._metrics.coalesced_samples += 1
+
+    def _loadReportDescriptor(self, h):
+        # newer versions of hidapi can read the device's report descriptor
+        if not hasattr(h, "get_report_descriptor"):
+            Logger.log("d", "No decoder for profile %s and the report descriptor is not available", self._profile_name)
+            return
+        try:
+            report_decoder = ReportDecoder.fromDescriptor(h.get_report_descriptor())
+        except Exception as e:
+            Logger.log("e", "Exception parsing report descriptor: %s", e)
+            return
+        if report_decoder.isEmpty():
+            Logger.log("d", "Report descriptor does not describe any axes or buttons")
+            return
+        Logger.log("d", "Report layout from descriptor:\n%s", report_decoder.describe())
+        self._report_decoder = report_decoder
+        self._decoder = self._decodeReportEvent
+
+    def _decodeReportEvent(self, buf):
+        report = self._report_decoder.getReport(buf)
+        if report is None:
+            self._metrics.decode_errors += 1
+            return
+        if report.decodeAxes:
+            data = bytes(buf)
+            axis_scale = self._axis_scale
+            axis_offset = self._axis_offset
+            for a, val in zip(report.axes, report.decodeAxes(data)):
+                if a < len(axis_scale):
+                    self._axis_value[a] = val * axis_scale[a] + axis_offset[a]
+            self._mouseAxisEvent(self._axis_value)
+        if report.decodeButtons:
+            buttons = report.decodeButtons(bytes(buf))
+            if buttons != self._buttons:
+                for b in range(0, max(buttons.bit_length(), self._buttons.bit_length())):
+                    mask = 1 << b
+                    if (buttons & mask) != (self._buttons & mask):
+                        self._mouseButtonEvent(b + 1, (buttons & mask) >> b)
+                self._buttons = buttons
 
     def _decodeUnknownEvent(self, buf):
+        self._metrics.decode_errors += 1
         s = "[" + str(buf[0])
         for i in range(1, len(buf)):
             s += ", " + str(buf[i])
         s += "]"
         Logger.log("d", s)
 
+    def _setActiveView(self, view_name):
+        self._metrics.view_switches += 1
+        self._controller.setActiveView(view_name)
+
     def _getScalingDueToZoom(self):
         scale = 1.0
         if self._scene:
@@ -575,10 +1140,14 @@ class RawMouse(Extension, QObject,):
             message = "No device found"
             if self._hid_dev:
                 message = "Manufacturer: " + self._hid_dev["manufacturer_string"] + "\nProduct: " + self._hid_dev["product_string"] + "\nProfile: " + self._profile_name
-            elif libspnav is not None:
+            elif Spnav.libspnav is not None:
                 message = "Using libspnav"
+            if self._reader_process is not None:
+                message += "\nReading events in a separate process"
             if self._battery_level is not None:
                 message += "\nBattery level: " + str(self._battery_level) + "%"
+            if self._metrics.discovery_time_ms is not None:
+                message += "\nStartup: " + str(self._metrics.init_time_ms) + " ms, discovery: " + str(self._metrics.discovery_time_ms) + " ms"
             if self._profile:
                 message += "\nAxes:"
                 for i in range(0, len(self._axis_scale)):
@@ -593,6 +1162,21 @@ class RawMouse(Extension, QObject,):
         except Exception as e:
             Logger.log("e", "Exception while showing device information: %s", e)
 
+    def _dumpFlightRecorder(self, reason = None):
+        # automatic dumps are limited to one a minute so that a repeating exception doesn't fill the disk
+        now = time.monotonic()
+        if reason is not None and self._last_flight_recorder_dump_at is not None and now - self._last_flight_recorder_dump_at < 60:
+            return
+        self._last_flight_recorder_dump_at = now
+        path = os.path.join(Resources.getDataStoragePath(), "rawmouse_flight_" + time.strftime("%Y%m%d-%H%M%S") + ".csv")
+        try:
+            count = self._flight_recorder.dump(path, AXIS_TARGETS)
+            Logger.log("i", "Flight recorder dumped %d records to %s%s", count, path, (" after " + reason) if reason else "")
+            if reason is None:
+                self._showMessage("Flight recorder dumped " + str(count) + " records to " + path)
+        except Exception as e:
+            Logger.log("e", "Exception while dumping flight recorder: %s", e)
+
     def _showMessage(self, str):
         if self._message is None:
             self._message = Message(title=catalog.i18nc("@info:title", "RawMouse " + self.getVersion()))
@@ -637,9 +1221,14 @@ class RawMouse(Extension, QObject,):
         mroll.setByRotationAxis(self._roll, (n - self._camera_tool._origin))
         camera.lookAt(self._camera_tool._origin, Vector.Unit_Y.multiply(mroll))
 
+    def _cacheAxisTransform(self):
+        # replaced as a whole so the reader never sees a partly flipped transform
+        self._axis_transform = tuple(zip(self._axis_scale, self._axis_offset)) + ((0.0, 0.0),) * (6 - min(6, len(self._axis_scale)))
+
     def _flipAxes(self):
         for i in range(0, len(self._axis_scale)):
             self._axis_scale[i] *= -1
+        self._cacheAxisTransform()
         self._preferences.setValue("rawmouse/flip_axes", not self._preferences.getValue("rawmouse/flip_axes"))
         return
 
@@ -647,159 +1236,35 @@ class RawMouse(Extension, QObject,):
         self._running = True
         Logger.log("d", "Reading events from libspnav...")
         try:
-            if spnavOpen() == False:
+            if Spnav.spnavOpen() == False:
                 self._last_camera_update_at = QElapsedTimer()
                 self._last_camera_update_at.start()
                 self._fast_view = False
                 while self._running:
                     if self._main_window:
-                        event = spnavWaitEvent()
+                        event = Spnav.spnavWaitEvent()
                         if event is not None:
-                            if self._main_window.isActive():
-                                if event.type == SPNAV_EVENT_MOTION:
+                            self._metrics.reports_read["libspnav"] += 1
+                            if not self._gui_state.window_active:
+                                self._metrics.dropped_samples += 1
+                            else:
+                                if event.type == Spnav.SPNAV_EVENT_MOTION:
                                     if event.motion.x == 0 and event.motion.y == 0 and event.motion.z == 0 and event.motion.rx == 0 and event.motion.ry == 0 and event.motion.rz == 0:
                                         if self._fast_view:
-                                            self._controller.setActiveView("SimulationView")
+                                            self._setActiveView("SimulationView")
                                             self._fast_view = False
+                                    m = event.motion
                                     scale = 1 / 500.0
-                                    self._mouseAxisEvent([
-                                        event.motion.x * scale * self._axis_scale[0] + self._axis_offset[0],
-                                        event.motion.y * scale * self._axis_scale[1] + self._axis_offset[1],
-                                        event.motion.z * scale * self._axis_scale[2] + self._axis_offset[2],
-                                        event.motion.rx * scale * self._axis_scale[3] + self._axis_offset[3],
-                                        event.motion.ry * scale * self._axis_scale[4] + self._axis_offset[4],
-                                        event.motion.rz * scale * self._axis_scale[5] + self._axis_offset[5]
-                                    ])
-                                elif event.type == SPNAV_EVENT_BUTTON:
+                                    self._mouseAxisEvent([ v * scale * k + o for v, (k, o) in zip((m.x, m.y, m.z, m.rx, m.ry, m.rz), self._axis_transform) ])
+                                elif event.type == Spnav.SPNAV_EVENT_BUTTON:
                                     self._mouseButtonEvent(event.button.bnum, event.button.press)
                     else:
-                        self._getComponents()
                         time.sleep(0.1)
-                spnavClose()
+                Spnav.spnavClose()
             else:
                 Logger.log("e", "spnavOpen() failed")
         except Exception as e:
             Logger.log("e", "Exception while reading libspnav events: %s", e)
+            self._dumpFlightRecorder("libspnav reader exception")
         self._running = False
         self._runner = None
-
-# -----------------------------------------------------------------------------
-# Definitions for data structures of spnav library
-#
-# Copied from https://github.com/xythobuz/spacenav-plus, thanks!
-
-# enum {
-#     SPNAV_EVENT_ANY = 0,	/* used by spnav_remove_events() */
-#     SPNAV_EVENT_MOTION = 1,
-#     SPNAV_EVENT_BUTTON = 2	/* includes both press and release */
-# };
-(SPNAV_EVENT_ANY, SPNAV_EVENT_MOTION, SPNAV_EVENT_BUTTON) = (0, 1, 2)
-
-# struct spnav_event_motion {
-#     int type;
-#     int x, y, z;
-#     int rx, ry, rz;
-#     unsigned int period;
-#     int *data;
-# };
-class SpnavMotionEvent(Structure): pass
-SpnavMotionEvent._fields_ = [
-    ('type', c_int),
-    ('x', c_int),
-    ('y', c_int),
-    ('z', c_int),
-    ('rx', c_int),
-    ('ry', c_int),
-    ('rz', c_int),
-    ('period', c_uint),
-    ('data', POINTER(c_uint))
-]
-
-# struct spnav_event_button {
-#     int type;
-#     int press;
-#     int bnum;
-# };
-class SpnavButtonEvent(Structure): pass
-SpnavButtonEvent._fields_ = [
-    ('type', c_int),
-    ('press', c_int),
-    ('bnum', c_int)
-]
-
-# typedef union spnav_event {
-#     int type;
-#     struct spnav_event_motion motion;
-#     struct spnav_event_button button;
-# } spnav_event;
-class SpnavEvent(Union): pass
-SpnavEvent._fields_ = [
-    ('type', c_int),
-    ('motion', SpnavMotionEvent),
-    ('button', SpnavButtonEvent)
-]
-
-# -----------------------------------------------------------------------------
-# Actual python wrapper methods
-
-# Open connection to the daemon via AF_UNIX socket
-# Returns 'True' on error, 'False' on success
-def spnavOpen():
-    result = libspnav.spnav_open()
-    if result == -1:
-        return True
-    return False
-
-# Close connection to the daemon
-# Returns 'True' on error, 'False' on success
-def spnavClose():
-    result = libspnav.spnav_close()
-    if result == -1:
-        return True
-    return False
-
-# Blocks waiting for space-nav events
-# Returns 'None' on error or an event on success
-def spnavWaitEvent():
-    event = SpnavEvent(SPNAV_EVENT_ANY,
-                  SpnavMotionEvent(0, 0, 0, 0, 0, 0, 0, 0, None),
-                  SpnavButtonEvent(0, 0, 0))
-    result = libspnav.spnav_wait_event(byref(event))
-    if result == 0:
-        return None
-    return event
-
-# Checks for the availability of space-nav events (non-blocking)
-# Returns 'None' if no event available or an event on success
-def spnavPollEvent():
-    event = SpnavEvent(SPNAV_EVENT_ANY,
-                  SpnavMotionEvent(0, 0, 0, 0, 0, 0, 0, 0, None),
-                  SpnavButtonEvent(0, 0, 0))
-    result = libspnav.spnav_poll_event(byref(event))
-    if result == 0:
-        return None
-    return event
-
-# Removes any pending events from the specified type, or all pending
-# events if the type argument is SPNAV_EVENT_ANY. Returns the number
-# of removed events.
-def spnavRemoveEvents(eventType):
-    return libspnav.spnav_remove_events(eventType)
-
-def setup_libspnav_fns():
-    # int spnav_open(void);
-    libspnav.spnav_open.restype = c_int
-    #libspnav.spnav_open.argtypes = [None]
-    # int spnav_close(void);
-    libspnav.spnav_close.restype = c_int
-    #libspnav.spnav_close.argtypes = [None]
-    # int spnav_wait_event(spnav_event *event);
-    libspnav.spnav_wait_event.restype = c_int
-    libspnav.spnav_wait_event.argtypes = [POINTER(SpnavEvent)]
-    # int spnav_poll_event(spnav_event *event);
-    libspnav.spnav_poll_event.restype = c_int
-    libspnav.spnav_poll_event.argtypes = [POINTER(SpnavEvent)]
-    # int spnav_remove_events(int type);
-    libspnav.spnav_remove_events.restype = c_int
-    libspnav.spnav_remove_events.argtypes = [c_int]
-
@@ -0,0 +1,272 @@
+# Copyright (c) 2020-2024 burtoogle.
+# RawMouse is released under the terms of the AGPLv3 or higher.
+
+# Out of process event reader.
+#
+# When run as a script, this module opens the HID device (or connects to the spacenavd daemon via
+# libspnav), decodes the events and publishes them to a ring buffer in shared memory that is read
+# by the plugin on Cura's GUI thread. Running the reader in its own process means that it isn't
+# starved of the GIL while Cura's main thread is busy. This module only depends on the standard
+# library so that it can be run by any Python interpreter that has a matching hidapi binary.
+
+import json
+import os
+import os.path
+import platform
+import struct
+import sys
+import time
+
+from threading import Thread
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # requires Python 3.8
+    shared_memory = None
+
+# HID profiles that can be decoded by the reader process
+PROFILES = ("spacemouse", "os3m")
+
+# frame kinds
+FRAME_AXES = 1
+FRAME_BUTTON = 2
+
+# reader status
+STATUS_STARTING = 0
+STATUS_RUNNING = 1
+STATUS_FAILED = -1
+
+# header layout: write index, heartbeat, reports read, decode errors, stop request, status, battery level, capacity
+_HEADER = struct.Struct("<QQQQiiiI")
+_HEADER_SIZE = 64
+# the stop request is written by the plugin, everything else by the reader process
+_WRITE_INDEX = struct.Struct("<Q")
+_COUNTERS = struct.Struct("<QQQ")
+_COUNTERS_OFFSET = 8
+_STOP = struct.Struct("<i")
+_STOP_OFFSET = 32
+_STATUS = struct.Struct("<ii")
+_STATUS_OFFSET = 36
+
+# frame layout: timestamp, 6 axes, kind, button number, button state
+_FRAME = struct.Struct("<d6fBBBx")
+
+def getHidapiPath():
+    pv = ".".join(platform.python_version_tuple()[0:2])
+    if sys.platform == "linux":
+        sys_name = "linux-" + os.uname().machine
+    elif sys.platform == "win32":
+        sys_name = "win-amd64"
+    elif sys.platform == "darwin":
+        sys_name = "macosx-10.13-" + ("intel" if pv == "3.5" else os.uname().machine)
+    else:
+        sys_name = "unknown"
+    hidapi_name = "hidapi-0.9.0-py" + pv + "-" + sys_name
+    if pv == "3.5" or pv == "3.8":
+        hidapi_name += ".egg"
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), "hidapi", hidapi_name)
+
+## Single producer, single consumer ring buffer of decoded frames.
+#
+#  The writer stores a frame and then advances the write index, the reader keeps its own read
+#  index. If the reader falls more than a whole buffer behind, the oldest frames are skipped.
+
+class FrameRing:
+    def __init__(self, buf, capacity = 0):
+        self._buf = buf
+        if capacity:
+            _HEADER.pack_into(buf, 0, 0, 0, 0, 0, 0, STATUS_STARTING, -1, capacity)
+        self._capacity = _HEADER.unpack_from(buf, 0)[7]
+        self._write_index = 0
+        self._read_index = 0
+        self._heartbeat = 0
+        self._reports = 0
+        self._decode_errors = 0
+        self._status = STATUS_STARTING
+        self._battery_level = -1
+
+    @staticmethod
+    def getSize(capacity):
+        return _HEADER_SIZE + capacity * _FRAME.size
+
+    def release(self):
+        self._buf = None
+
+    # writer side
+
+    def publish(self, kind, axes, button = 0, state = 0):
+        offset = _HEADER_SIZE + (self._write_index % self._capacity) * _FRAME.size
+        _FRAME.pack_into(self._buf, offset, time.monotonic(), axes[0], axes[1], axes[2], axes[3], axes[4], axes[5], kind, button, state)
+        self._write_index += 1
+        _WRITE_INDEX.pack_into(self._buf, 0, self._write_index)
+
+    def beat(self, reports = 0, decode_errors = 0):
+        self._heartbeat += 1
+        self._reports += reports
+        self._decode_errors += decode_errors
+        _COUNTERS.pack_into(self._buf, _COUNTERS_OFFSET, self._heartbeat, self._reports, self._decode_errors)
+        _STATUS.pack_into(self._buf, _STATUS_OFFSET, self._status, self._battery_level)
+
+    def setStatus(self, status):
+        self._status = status
+        self.beat()
+
+    def setBatteryLevel(self, level):
+        self._battery_level = level
+
+    def isStopRequested(self):
+        return _STOP.unpack_from(self._buf, _STOP_OFFSET)[0] != 0
+
+    # reader side
+
+    def requestStop(self):
+        _STOP.pack_into(self._buf, _STOP_OFFSET, 1)
+
+    def getState(self):
+        # returns heartbeat, reports read, decode errors, status and battery level
+        return _COUNTERS.unpack_from(self._buf, _COUNTERS_OFFSET) + _STATUS.unpack_from(self._buf, _STATUS_OFFSET)
+
+    def read(self):
+        # returns the frames published since the last call and the number of frames that were overwritten before they could be read
+        write_index = _WRITE_INDEX.unpack_from(self._buf, 0)[0]
+        dropped = 0
+        if write_index - self._read_index > self._capacity:
+            dropped = write_index - self._read_index - self._capacity
+            self._read_index = write_index - self._capacity
+        frames = []
+        while self._read_index < write_index:
+            frames.append(_FRAME.unpack_from(self._buf, _HEADER_SIZE + (self._read_index % self._capacity) * _FRAME.size))
+            self._read_index += 1
+        return frames, dropped
+
+class _Decoder:
+    def __init__(self, ring, profile):
+        self._ring = ring
+        self._axes = [0.0] * 6
+        self._buttons = 0
+        self.decode = getattr(self, "_decode_" + profile)
+
+    def _publishButtons(self, buttons):
+        for b in range(0, 16):
+            mask = 1 << b
+            if (buttons & mask) != (self._buttons & mask):
+                self._ring.publish(FRAME_BUTTON, self._axes, b + 1, (buttons & mask) >> b)
+        self._buttons = buttons
+
+    def _decode_spacemouse(self, buf):
+        scale = 1.0 / 350.0
+        if len(buf) == 7 and (buf[0] == 1 or buf[0] == 2):
+            for a in range(0, 3):
+                val = buf[2 * a + 1] | buf[2 * a + 2] << 8
+                if val & 0x8000:
+                    val = val - 0x10000
+                self._axes[(buf[0] - 1) * 3 + a] = val * scale
+            self._ring.publish(FRAME_AXES, self._axes)
+        elif len(buf) == 13 and buf[0] == 1:
+            for a in range(0, 6):
+                val = buf[2 * a + 1] | buf[2 * a + 2] << 8
+                if val & 0x8000:
+                    val = val - 0x10000
+                self._axes[a] = val * scale
+            self._ring.publish(FRAME_AXES, self._axes)
+        elif len(buf) >= 3 and buf[0] == 3:
+            self._publishButtons(buf[1] | buf[2] << 8)
+        elif len(buf) >= 3 and buf[0] == 0x17:
+            self._ring.setBatteryLevel(buf[1])
+        else:
+            return False
+        return True
+
+    def _decode_os3m(self, buf):
+        scale = 1.0 / 350.0
+        if len(buf) == 12:
+            for a in range(0, 6):
+                val = buf[2 * a] | buf[2 * a + 1] << 8
+                if val & 0x8000:
+                    val = val - 0x10000
+                self._axes[a] = val * scale
+            self._ring.publish(FRAME_AXES, self._axes)
+            return True
+        return False
+
+def _runHid(ring, options):
+    sys.path.append(getHidapiPath())
+    import hid
+    h = hid.device()
+    if options["path"]:
+        h.open_path(bytes.fromhex(options["path"]))
+    else:
+        h.open(options["vendor_id"], options["product_id"])
+    decoder = _Decoder(ring, options["profile"])
+    ring.setStatus(STATUS_RUNNING)
+    try:
+        while not ring.isStopRequested():
+            d = h.read(64, 100)
+            if d:
+                ring.beat(1, 0 if decoder.decode(d) else 1)
+            else:
+                ring.beat()
+    finally:
+        h.close()
+
+def _runLibspnav(ring, options):
+    import select
+    import Spnav
+    Spnav.loadLibspnav(options["libspnav"])
+    if Spnav.spnavOpen():
+        raise IOError("spnavOpen() failed")
+    scale = 1 / 500.0
+    axes = [0.0] * 6
+    ring.setStatus(STATUS_RUNNING)
+    try:
+        fd = Spnav.spnavFd()
+        while not ring.isStopRequested():
+            select.select([fd], [], [], 0.1)
+            reports = 0
+            event = Spnav.spnavPollEvent()
+            while event is not None:
+                reports += 1
+                if event.type == Spnav.SPNAV_EVENT_MOTION:
+                    m = event.motion
+                    axes = [m.x * scale, m.y * scale, m.z * scale, m.rx * scale, m.ry * scale, m.rz * scale]
+                    ring.publish(FRAME_AXES, axes)
+                elif event.type == Spnav.SPNAV_EVENT_BUTTON:
+                    ring.publish(FRAME_BUTTON, axes, event.button.bnum, event.button.press)
+                event = Spnav.spnavPollEvent()
+            ring.beat(reports)
+    finally:
+        Spnav.spnavClose()
+
+def _watchParent(ring):
+    # the plugin never writes to stdin so EOF means that it has closed the pipe or Cura has gone away
+    try:
+        sys.stdin.buffer.read()
+        ring.requestStop()
+    except:
+        # the ring has already been released
+        pass
+
+def main():
+    options = json.loads(sys.argv[1])
+    shm = shared_memory.SharedMemory(name = options["shm"])
+    if os.name == "posix":
+        # the plugin owns the shared memory, stop this process' resource tracker from unlinking it on exit
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    ring = FrameRing(shm.buf)
+    Thread(target = _watchParent, args = (ring,), daemon = True).start()
+    try:
+        if options["backend"] == "libspnav":
+            _runLibspnav(ring, options)
+        else:
+            _runHid(ring, options)
+    except:
+        ring.setStatus(STATUS_FAILED)
+        raise
+    finally:
+        ring.release()
+        shm.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# Copyright (c) 2020-2024 burtoogle.
+# RawMouse is released under the terms of the AGPLv3 or higher.
+
+import struct
+
+from collections import namedtuple
+
+# An axis or button field of an input report. The bit offset is relative to the start of the report data (after the report ID, if any).
+# For axes, index is the axis number (0 - 5 = X, Y, Z, Rx, Ry, Rz), for buttons it is the button number (starting from 1).
+Field = namedtuple("Field", [ "index", "bit", "size", "logical_min", "logical_max" ])
+
+# HID usage pages and usages
+_GENERIC_DESKTOP_PAGE = 0x01
+_BUTTON_PAGE = 0x09
+_USAGE_X = 0x30
+_USAGE_RZ = 0x35
+
+## Decoder for devices that don't have a hand written decoder function.
+#
+#  The report layouts come either from the device's HID report descriptor or from a "reports" definition
+#  in the profile. For each report ID, the layout is compiled into a precomputed struct format (when the
+#  axes are byte aligned) or a list of bit field extractions so decoding a report doesn't have to
+#  interpret the layout again.
+
+class ReportDecoder:
+    def __init__(self, layouts):
+        # layouts maps report ID (0 if the device doesn't use report IDs) to (axis fields, button fields)
+        self._numbered = 0 not in layouts
+        self._reports = {}
+        for report_id, (axes, buttons) in layouts.items():
+            if axes or buttons:
+                self._reports[report_id] = _Report(axes, buttons, 1 if self._numbered else 0)
+
+    def isEmpty(self):
+        return not self._reports
+
+    def getReport(self, buf):
+        # returns the compiled report that decodes buf or None if there isn't one
+        report = self._reports.get(buf[0] if self._numbered else 0)
+        if report is not None and len(buf) >= report.length:
+            return report
+        return None
+
+    def describe(self):
+        lines = []
+        for report_id in sorted(self._reports):
+            report = self._reports[report_id]
+            lines.append("report %d: axes %s, %d buttons" % (report_id, list(report.axes), report.button_count))
+        return "\n".join(lines)
+
+    @classmethod
+    def fromProfile(cls, reports):
+        # e.g. "reports": { "1": { "axes": [ { "axis": 0, "bit": 0, "size": 16, "min": -350, "max": 350 }, ... ], "buttons": { "bit": 0, "count": 16 } } }
+        layouts = {}
+        for report_id, report in reports.items():
+            axes = []
+            for axis in report.get("axes", []):
+                axes.append(Field(axis["axis"], axis["bit"], axis["size"], axis.get("min", -(1 << (axis["size"] - 1))), axis.get("max", (1 << (axis["size"] - 1)) - 1)))
+            buttons = []
+            if "buttons" in report:
+                first = report["buttons"].get("first", 1)
+                for b in range(0, report["buttons"]["count"]):
+                    buttons.append(Field(first + b, report["buttons"]["bit"] + b, 1, 0, 1))
+            layouts[int(report_id, base = 0)] = (axes, buttons)
+        return cls(layouts)
+
+    @classmethod
+    def fromDescriptor(cls, descriptor):
+        layouts = {}
+        bit_offsets = {}
+        state = { "usage_page": 0, "logical_min": 0, "logical_max": 0, "unsigned_logical_max": 0, "report_size": 0, "report_id": 0, "report_count": 0 }
+        global_stack = []
+        usages = []
+        usage_min = None
+        usage_max = None
+        i = 0
+        while i < len(descriptor):
+            prefix = descriptor[i]
+            if prefix == 0xfe:
+                # long item
+                i += 3 + (descriptor[i + 1] if i + 1 < len(descriptor) else 0)
+                continue
+            size = (0, 1, 2, 4)[prefix & 0x03]
+            item_type = (prefix >> 2) & 0x03
+            tag = prefix >> 4
+            data = bytes(descriptor[i + 1:i + 1 + size])
+            i += 1 + size
+            value = int.from_bytes(data, "little") if size else 0
+            signed_value = int.from_bytes(data, "little", signed = True) if size else 0
+            if item_type == 1:
+                # global
+                if tag == 0x0:
+                    state["usage_page"] = value
+                elif tag == 0x1:
+                    state["logical_min"] = signed_value
+                elif tag == 0x2:
+                    state["logical_max"] = signed_value
+                    state["unsigned_logical_max"] = value
+                elif tag == 0x7:
+                    state["report_size"] = value
+                elif tag == 0x8:
+                    state["report_id"] = value
+                elif tag == 0x9:
+                    state["report_count"] = value
+                elif tag == 0xa:
+                    global_stack.append(dict(state))
+                elif tag == 0xb and global_stack:
+                    state = global_stack.pop()
+            elif item_type == 2:
+                # local, a 4 byte usage includes the usage page
+                if tag == 0x0:
+                    usages.append(value if size == 4 else (state["usage_page"] << 16) | value)
+                elif tag == 0x1:
+                    usage_min = value if size == 4 else (state["usage_page"] << 16) | value
+                elif tag == 0x2:
+                    usage_max = value if size == 4 else (state["usage_page"] << 16) | value
+            elif item_type == 0:
+                # main
+                if tag == 0x8:
+                    report_id = state["report_id"]
+                    bit = bit_offsets.get(report_id, 0)
+                    axes, buttons = layouts.setdefault(report_id, ([], []))
+                    logical_min = state["logical_min"]
+                    logical_max = state["logical_max"]
+                    if logical_min >= 0 and logical_max < 0:
+                        # the logical maximum is unsigned when the minimum isn't negative
+                        logical_max = state["unsigned_logical_max"]
+                    if usage_min is not None and usage_max is not None:
+                        usages.extend(range(usage_min, usage_max + 1))
+                    # constant fields are padding and array fields are not used by 6 DOF devices
+                    if not value & 0x01 and value & 0x02 and usages:
+                        for n in range(0, state["report_count"]):
+                            usage = usages[n] if n < len(usages) else usages[-1]
+                            field_bit = bit + n * state["report_size"]
+                            page = usage >> 16
+                            usage &= 0xffff
+                            if page == _GENERIC_DESKTOP_PAGE and _USAGE_X <= usage <= _USAGE_RZ:
+                                axes.append(Field(usage - _USAGE_X, field_bit, state["report_size"], logical_min, logical_max))
+                            elif page == _BUTTON_PAGE and usage > 0:
+                                buttons.append(Field(usage, field_bit, state["report_size"], logical_min, logical_max))
+                    bit_offsets[report_id] = bit + state["report_count"] * state["report_size"]
+                if tag in (0x8, 0x9, 0xa, 0xb):
+                    usages = []
+                    usage_min = None
+                    usage_max = None
+        return cls(layouts)
+
+class _Report:
+    def __init__(self, axes, buttons, data_start):
+        end_bit = max([ f.bit + f.size for f in axes + buttons ])
+        self.length = data_start + (end_bit + 7) // 8
+        self.axes = tuple([ f.index for f in sorted(axes, key = lambda f: f.bit) ])
+        self.button_count = len(buttons)
+        self.decodeAxes = _compileAxes(sorted(axes, key = lambda f: f.bit), data_start) if axes else None
+        self.decodeButtons = _compileButtons(buttons, data_start) if buttons else None
+
+def _getNormalisation(field):
+    # maps the logical range to -1.0 .. 1.0
+    centre = (field.logical_min + field.logical_max) / 2.0
+    half_range = (field.logical_max - field.logical_min) / 2.0
+    return centre, (1.0 / half_range) if half_range else 0.0
+
+def _compileAxes(fields, data_start):
+    centres = []
+    scales = []
+    for f in fields:
+        centre, scale = _getNormalisation(f)
+        centres.append(centre)
+        scales.append(scale)
+    normalisation = tuple(zip(centres, scales))
+    codes = { 8: "bB", 16: "hH", 32: "iI" }
+    if all([ f.bit % 8 == 0 and f.size in codes for f in fields ]):
+        # byte aligned, build a single struct format with pad bytes between the fields
+        fmt = "<"
+        byte = fields[0].bit // 8
+        start = data_start + byte
+        for f in fields:
+            if f.bit // 8 < byte:
+                break
+            fmt += "x" * (f.bit // 8 - byte) + codes[f.size][0 if f.logical_min < 0 else 1]
+            byte = f.bit // 8 + f.size // 8
+        else:
+            unpack_from = struct.Struct(fmt).unpack_from
+            def decodeAxes(data):
+                return [ (v - c) * k for v, (c, k) in zip(unpack_from(data, start), normalisation) ]
+            return decodeAxes
+    # general case, extract each field from the report as an integer
+    extractors = []
+    for f in fields:
+        mask = (1 << f.size) - 1
+        sign_bit = (1 << (f.size - 1)) if f.logical_min < 0 else 0
+        extractors.append((data_start + f.bit // 8, data_start + (f.bit + f.size + 7) // 8, f.bit % 8, mask, sign_bit))
+    def decodeAxes(data):
+        vals = []
+        for (first, last, shift, mask, sign_bit), (c, k) in zip(extractors, normalisation):
+            v = (int.from_bytes(data[first:last], "little") >> shift) & mask
+            if v & sign_bit:
+                v -= mask + 1
+            vals.append((v - c) * k)
+        return vals
+    return decodeAxes
+
+def _compileButtons(fields, data_start):
+    # buttons are returned as a bit mask where bit 0 is button 1
+    first_bit = min([ f.bit for f in fields ])
+    last_bit = max([ f.bit + f.size for f in fields ])
+    first = data_start + first_bit // 8
+    last = data_start + (last_bit + 7) // 8
+    shift = first_bit % 8
+    base = min([ f.index for f in fields ])
+    if all([ f.size == 1 and f.bit - first_bit == f.index - base for f in fields ]):
+        # one bit per button in button order so the mask can be extracted in one go
+        mask = (1 << (last_bit - first_bit)) - 1
+        def decodeButtons(data):
+            return ((int.from_bytes(data[first:last], "little") >> shift) & mask) << (base - 1)
+        return decodeButtons
+    bits = tuple([ (f.bit - first_bit + shift, f.index - 1) for f in fields ])
+    def decodeButtons(data):
+        value = int.from_bytes(data[first:last], "little")
+        buttons = 0
+        for bit, b in bits:
+            if value >> bit & 1:
+                buttons |= 1 << b
+        return buttons
+    return decodeButtons
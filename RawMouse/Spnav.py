@@ -0,0 +1,141 @@
+# Copyright (c) 2020-2024 burtoogle.
+# RawMouse is released under the terms of the AGPLv3 or higher.
+
+# This module only depends on the standard library so that it can also be used by the reader process.
+
+from ctypes import *
+
+libspnav = None
+
+def loadLibspnav(path):
+    global libspnav
+    if libspnav is None:
+        libspnav = cdll.LoadLibrary(path)
+        setup_libspnav_fns()
+
+# -----------------------------------------------------------------------------
+# Definitions for data structures of spnav library
+#
+# Copied from https://github.com/xythobuz/spacenav-plus, thanks!
+
+# enum {
+#     SPNAV_EVENT_ANY = 0,	/* used by spnav_remove_events() */
+#     SPNAV_EVENT_MOTION = 1,
+#     SPNAV_EVENT_BUTTON = 2	/* includes both press and release */
+# };
+(SPNAV_EVENT_ANY, SPNAV_EVENT_MOTION, SPNAV_EVENT_BUTTON) = (0, 1, 2)
+
+# struct spnav_event_motion {
+#     int type;
+#     int x, y, z;
+#     int rx, ry, rz;
+#     unsigned int period;
+#     int *data;
+# };
+class SpnavMotionEvent(Structure): pass
+SpnavMotionEvent._fields_ = [
+    ('type', c_int),
+    ('x', c_int),
+    ('y', c_int),
+    ('z', c_int),
+    ('rx', c_int),
+    ('ry', c_int),
+    ('rz', c_int),
+    ('period', c_uint),
+    ('data', POINTER(c_uint))
+]
+
+# struct spnav_event_button {
+#     int type;
+#     int press;
+#     int bnum;
+# };
+class SpnavButtonEvent(Structure): pass
+SpnavButtonEvent._fields_ = [
+    ('type', c_int),
+    ('press', c_int),
+    ('bnum', c_int)
+]
+
+# typedef union spnav_event {
+#     int type;
+#     struct spnav_event_motion motion;
+#     struct spnav_event_button button;
+# } spnav_event;
+class SpnavEvent(Union): pass
+SpnavEvent._fields_ = [
+    ('type', c_int),
+    ('motion', SpnavMotionEvent),
+    ('button', SpnavButtonEvent)
+]
+
+# -----------------------------------------------------------------------------
+# Actual python wrapper methods
+
+# Open connection to the daemon via AF_UNIX socket
+# Returns 'True' on error, 'False' on success
+def spnavOpen():
+    result = libspnav.spnav_open()
+    if result == -1:
+        return True
+    return False
+
+# Close connection to the daemon
+# Returns 'True' on error, 'False' on success
+def spnavClose():
+    result = libspnav.spnav_close()
+    if result == -1:
+        return True
+    return False
+
+# Blocks waiting for space-nav events
+# Returns 'None' on error or an event on success
+def spnavWaitEvent():
+    event = SpnavEvent(SPNAV_EVENT_ANY,
+                  SpnavMotionEvent(0, 0, 0, 0, 0, 0, 0, 0, None),
+                  SpnavButtonEvent(0, 0, 0))
+    result = libspnav.spnav_wait_event(byref(event))
+    if result == 0:
+        return None
+    return event
+
+# Checks for the availability of space-nav events (non-blocking)
+# Returns 'None' if no event available or an event on success
+def spnavPollEvent():
+    event = SpnavEvent(SPNAV_EVENT_ANY,
+                  SpnavMotionEvent(0, 0, 0, 0, 0, 0, 0, 0, None),
+                  SpnavButtonEvent(0, 0, 0))
+    result = libspnav.spnav_poll_event(byref(event))
+    if result == 0:
+        return None
+    return event
+
+# Removes any pending events from the specified type, or all pending
+# events if the type argument is SPNAV_EVENT_ANY. Returns the number
+# of removed events.
+def spnavRemoveEvents(eventType):
+    return libspnav.spnav_remove_events(eventType)
+
+# Returns the file descriptor of the connection to the daemon, it becomes
+# readable when events are pending
+def spnavFd():
+    return libspnav.spnav_fd()
+
+def setup_libspnav_fns():
+    # int spnav_open(void);
+    libspnav.spnav_open.restype = c_int
+    #libspnav.spnav_open.argtypes = [None]
+    # int spnav_close(void);
+    libspnav.spnav_close.restype = c_int
+    #libspnav.spnav_close.argtypes = [None]
+    # int spnav_wait_event(spnav_event *event);
+    libspnav.spnav_wait_event.restype = c_int
+    libspnav.spnav_wait_event.argtypes = [POINTER(SpnavEvent)]
+    # int spnav_poll_event(spnav_event *event);
+    libspnav.spnav_poll_event.restype = c_int
+    libspnav.spnav_poll_event.argtypes = [POINTER(SpnavEvent)]
+    # int spnav_remove_events(int type);
+    libspnav.spnav_remove_events.restype = c_int
+    libspnav.spnav_remove_events.argtypes = [c_int]
+    # int spnav_fd(void);
+    libspnav.spnav_fd.restype = c_int
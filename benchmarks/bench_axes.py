@@ -0,0 +1,96 @@
+# Copyright (c) 2020-2024 burtoogle.
+# RawMouse is released under the terms of the AGPLv3 or higher.
+
+# Compares the per event cost of the axis processing before and after the work vector was changed from a
+# dict keyed by target name to a list filled through a precomputed route table.
+#
+# The input is drained from a FrameRing (as used by the reader process) holding interleaved axis streams
+# from several devices. RawMouse.py can't be imported outside of Cura so the two versions of the axis
+# processing are copied from it here. Run with: python benchmarks/bench_axes.py
+
+import os.path
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "RawMouse"))
+
+from ReaderProcess import FrameRing, FRAME_AXES
+
+AXIS_TARGETS = ("movx", "movy", "rotyaw", "rotpitch", "rotroll", "zoom")
+
+# axis definitions (scale, threshold, target) of the spacemouse, os3m and a 4 axis device using a reports profile
+PROFILES = [
+    [ (-0.1, 0.01, "movx"), (-100.0, 1.0, "zoom"), (-0.1, 0.01, "movy"), (-0.05, 0.01, "rotpitch"), (-0.05, 0.01, "rotroll"), (0.1, 0.01, "rotyaw") ],
+    [ (-0.1, 0.01, "movx"), (-0.1, 0.01, "movy"), (-100.0, 1.0, "zoom"), (-0.05, 0.01, "rotpitch"), (-0.05, 0.01, "rotroll"), (0.1, 0.01, "rotyaw") ],
+    [ (0.1, 0.05, "movx"), (0.1, 0.05, "movy"), (50.0, 1.0, "zoom"), (0.1, 0.05, "rotyaw") ]
+]
+
+class Device:
+    def __init__(self, profile):
+        self.scale = [ a[0] for a in profile ]
+        self.offset = [ 0.0 ] * len(profile)
+        self.threshold = [ a[1] for a in profile ]
+        self.target = [ a[2] for a in profile ]
+        # ensure at least 6 axes are defined, the missing axes can never exceed their threshold
+        while len(self.threshold) < 6:
+            self.threshold.append(float("inf"))
+            self.target.append("")
+        self.value = [ 0.0 ] * 6
+        self.routes = tuple([ (i, self.threshold[i], AXIS_TARGETS.index(self.target[i])) for i in range(0, 6) if self.target[i] in AXIS_TARGETS ])
+        self.transform = tuple(zip(self.scale, self.offset)) + ((0.0, 0.0),) * (6 - min(6, len(self.scale)))
+
+def processDict(device, axes, scale):
+    # before: dict work keyed by target name, parallel lists indexed per axis
+    for i in range(0, len(device.scale)):
+        device.value[i] = axes[i] * device.scale[i] + device.offset[i]
+    vals = device.value
+    work = { "movx": 0.0, "movy": 0.0, "rotyaw": 0.0, "rotpitch": 0.0, "rotroll": 0.0, "zoom": 0.0 }
+    for i in range(0, 6):
+        if vals[i] > device.threshold[i]:
+            work[device.target[i]] = (vals[i] - device.threshold[i]) * scale
+        elif vals[i] < -device.threshold[i]:
+            work[device.target[i]] = (vals[i] + device.threshold[i]) * scale
+    return (work["movx"], work["movy"], work["rotyaw"], work["rotpitch"], work["rotroll"], work["zoom"])
+
+def processRoutes(device, axes, scale):
+    # after: six element work vector filled through the route table
+    device.value[0:6] = [ v * k + o for v, (k, o) in zip(axes, device.transform) ]
+    vals = device.value
+    work = [ 0.0 ] * 6
+    for i, threshold, t in device.routes:
+        val = vals[i]
+        if val > threshold:
+            work[t] = (val - threshold) * scale
+        elif val < -threshold:
+            work[t] = (val + threshold) * scale
+    return work
+
+def main():
+    capacity = 4096
+    ring = FrameRing(bytearray(FrameRing.getSize(capacity)), capacity)
+    devices = [ Device(profile) for profile in PROFILES ]
+    random.seed(1)
+    # interleave the devices' reports, the button field of the frame carries the device index
+    for n in range(0, capacity):
+        ring.publish(FRAME_AXES, [ random.uniform(-1.0, 1.0) for a in range(0, 6) ], n % len(devices))
+    frames, dropped = ring.read()
+    events = [ (devices[f[8]], f[1:7]) for f in frames ]
+
+    # both versions must produce the same work values
+    for device, axes in events:
+        assert list(processDict(device, axes, 1.5)) == processRoutes(device, axes, 1.5)
+
+    print("%d events from %d devices, best of 20 runs" % (len(events), len(devices)))
+    for name, process in (("dict loop", processDict), ("route table", processRoutes)):
+        best = None
+        for run in range(0, 20):
+            started_at = time.perf_counter()
+            for device, axes in events:
+                process(device, axes, 1.5)
+            elapsed = time.perf_counter() - started_at
+            best = elapsed if best is None else min(best, elapsed)
+        print("%-12s %.3f us/event" % (name, best / len(events) * 1e6))
+
+if __name__ == "__main__":
+    main()